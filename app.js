@@ -3,6 +3,9 @@
 let models = [];
 let tags = [];
 
+// Шардированный каталог (catalog/manifest.json от `flask export-static`)
+const catalog = { manifest: null, shards: new Map() };
+
 const state = {
   tags: [],
   activeTags: new Set(),
@@ -16,9 +19,41 @@ const state = {
 function qs(sel, root = document) { return root.querySelector(sel); }
 function qsa(sel, root = document) { return Array.from(root.querySelectorAll(sel)); }
 
+// Шарды неизменяемы (имя содержит хеш), поэтому кешируем промисы навсегда
+function fetchShard(file) {
+  if (!catalog.shards.has(file)) {
+    catalog.shards.set(file, fetch(`catalog/${file}`).then(r => {
+      if (!r.ok) throw new Error(`HTTP error! status: ${r.status}`);
+      return r.json();
+    }));
+  }
+  return catalog.shards.get(file);
+}
+
+// Модели для фильтрации: шарды выбранных тегов или, для поиска, все страницы
+async function catalogModels() {
+  const m = catalog.manifest;
+  const files = state.activeTags.size > 0
+    ? [...state.activeTags].map(t => m.tags[t] && m.tags[t].file).filter(Boolean)
+    : m.pages.map(p => p.file);
+  const byId = new Map();
+  (await Promise.all(files.map(fetchShard))).flat().forEach(model => byId.set(model.id, model));
+  return [...byId.values()];
+}
+
 // Функция для загрузки данных
 async function loadData() {
   try {
+    // Если есть шардированный каталог, грузим только манифест, а шарды по мере надобности
+    const manifestResponse = await fetch('catalog/manifest.json').catch(() => null);
+    if (manifestResponse && manifestResponse.ok) {
+      catalog.manifest = await manifestResponse.json();
+      tags = catalog.manifest.tag_list;
+      console.log(`Каталог: ${catalog.manifest.total} моделей, ${catalog.manifest.pages.length} шардов`);
+      initApp();
+      return;
+    }
+
     console.log('Начинаем загрузку models.json...');
     // Загружаем модели
     const modelsResponse = await fetch('models.json');
@@ -74,17 +109,38 @@ function createCard(model) {
   media.className = "card-media";
 
   const img = document.createElement("img");
-  img.src = model.image_url;
+  const thumb = model.thumbnail;
+  img.src = thumb ? thumb.src : model.image_url;
   img.alt = `${model.vendor}/${model.name}`;
   img.loading = "lazy";
   img.decoding = "async";
   img.sizes = "(max-width:560px) 100vw, (max-width:1100px) 50vw, 33vw";
   img.referrerPolicy = "no-referrer";
   img.onerror = () => {
+    // Thumbnail failed: try the original cover, then the placeholder
+    if (img.srcset) {
+      img.parentNode.querySelectorAll("source").forEach((source) => source.remove());
+      img.removeAttribute("srcset");
+      img.src = model.image_url;
+      return;
+    }
     const ph = getPlaceholder(model);
     if (img.src !== ph) img.src = ph;
   };
-  media.appendChild(img);
+  let mediaEl = img;
+  if (thumb) {
+    img.srcset = thumb.srcset;
+    if (thumb.avif_srcset) {
+      // AVIF where the browser supports it, WebP otherwise
+      const source = document.createElement("source");
+      source.type = "image/avif";
+      source.srcset = thumb.avif_srcset;
+      source.sizes = img.sizes;
+      mediaEl = document.createElement("picture");
+      mediaEl.append(source, img);
+    }
+  }
+  media.appendChild(mediaEl);
 
   const body = document.createElement("div");
   body.className = "card-body";
@@ -171,8 +227,31 @@ function loadTags() {
   renderTags();
 }
 
-function loadModels() {
-  let filteredModels = models;
+function renderPage(pageModels) {
+  const grid = qs(".cards-grid");
+  if (grid) {
+    grid.innerHTML = "";
+    pageModels.forEach(m => grid.appendChild(createCard(m)));
+  }
+  renderPager();
+}
+
+async function loadModels() {
+  if (catalog.manifest && !state.query && state.activeTags.size === 0) {
+    // Без фильтров: загружаем только шарды, покрывающие текущую страницу
+    const m = catalog.manifest;
+    state.total = m.total;
+    state.pages = Math.ceil(m.total / state.per_page);
+    const start = (state.page - 1) * state.per_page;
+    const first = Math.floor(start / m.page_size);
+    const last = Math.floor((start + state.per_page - 1) / m.page_size);
+    const shards = await Promise.all(m.pages.slice(first, last + 1).map(p => fetchShard(p.file)));
+    const offset = start - first * m.page_size;
+    renderPage(shards.flat().slice(offset, offset + state.per_page));
+    return;
+  }
+
+  let filteredModels = catalog.manifest ? await catalogModels() : models;
   
   // Фильтрация по тегам
   if (state.activeTags.size > 0) {
@@ -214,13 +293,7 @@ function loadModels() {
   const end = start + state.per_page;
   const pageModels = filteredModels.slice(start, end);
   
-  
-  const grid = qs(".cards-grid");
-  if (grid) {
-    grid.innerHTML = "";
-    pageModels.forEach(m => grid.appendChild(createCard(m)));
-  }
-  renderPager();
+  renderPage(pageModels);
 }
 
 function wireSearch() {
@@ -0,0 +1 @@
+"""Benchmarks for the catalog server. Run modules with `python -m bench.<name>`."""
@@ -0,0 +1,247 @@
+"""API and job benchmarks over synthetic catalogs.
+
+    python -m bench.api --sizes 1000,10000 --out results.json
+    python -m bench.api --sizes 10000 --baseline results.json
+    python -m bench.api --sizes 100000 --scenarios search,tag_filter_any --snapshot
+
+For each catalog size a fresh SQLite database is filled by bench.catalog and
+a bench.stub server stands in for Replicate. Read scenarios (search, tag
+filters, deep pagination, /api/tags) go through the Flask test client with
+the response cache disabled. Job scenarios (delta and full sync, enrich and
+its revalidation pass) run the registered handlers inline. Every scenario
+reports p50/p99 latency, SQL statements per run and peak traced memory, as
+JSON. With --baseline, each scenario also gets its p50 ratio to the earlier
+report.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+READ_SCENARIOS = ("tags", "search", "tag_filter_any", "tag_filter_all", "deep_offset", "deep_keyset")
+JOB_SCENARIOS = ("sync_delta", "sync_full", "enrich", "enrich_revalidate")
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def summarize(timings: List[float], statements: int, peak_bytes: int, **extra) -> dict:
+    return {
+        "runs": len(timings),
+        "p50_ms": round(percentile(timings, 50) * 1000, 3),
+        "p99_ms": round(percentile(timings, 99) * 1000, 3),
+        "statements": round(statements / len(timings), 1),
+        "peak_kb": round(peak_bytes / 1024, 1),
+        **extra,
+    }
+
+
+def traced_peak(fn: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_size(models: int, repeat: int, scenarios: List[str], seed: int) -> dict:
+    """Benchmark one catalog size. Must run in a fresh process: `server` binds
+    its database path at import."""
+    workdir = tempfile.mkdtemp(prefix=f"bench-api-{models}-")
+    os.environ["APP_DB_PATH"] = os.path.join(workdir, "bench.db")
+    os.environ["REPLICATE_RATE_LIMIT"] = "0"  # the stub is local, do not throttle ourselves
+    os.environ.setdefault("REPLICATE_API_TOKEN", "bench")
+
+    from bench.stub import StubReplicate
+
+    stub = StubReplicate().start()
+    os.environ["REPLICATE_API_BASE"] = stub.base_url
+
+    import server
+    from bench.catalog import generate_payloads, populate, upstream_changes
+    from sqlalchemy import event
+
+    payloads = generate_payloads(models, seed)
+    started = time.perf_counter()
+    populate(payloads)
+    report = {"models": models, "populate_seconds": round(time.perf_counter() - started, 3), "scenarios": {}}
+    if server.app.config["CATALOG_SNAPSHOT"]:
+        started = time.perf_counter()
+        server._refresh_snapshot()
+        report["snapshot_seconds"] = round(time.perf_counter() - started, 3)
+    churn = max(models // 100, 1)
+    stub.load(upstream_changes(payloads, changed=churn, added=churn, seed=seed))
+
+    server._response_cache = server.ResponseCache(0)
+    client = server.app.test_client()
+    statements = [0]
+
+    with server.app.app_context():
+        event.listen(server.db.engine, "before_cursor_execute", lambda *a: statements.__setitem__(0, statements[0] + 1))
+        index = server.get_tag_index()
+        popular = sorted(index.postings, key=lambda name: -len(index.postings[name]))[:2]
+        per_page = 60
+        last_page = max((models + per_page - 1) // per_page, 1)
+        # A cursor ~90% of the way through catalog order, as a deep keyset page would carry
+        deep = (
+            server.Model.query.order_by(server.Model.quality_score, server.Model.vendor, server.Model.name, server.Model.id)
+            .offset(int(models * 0.9)).first()
+        )
+        cursor = server.encode_cursor(deep)
+
+    read_urls: Dict[str, List[str]] = {
+        "tags": ["/api/tags"],
+        "search": [f"/api/models?q={q}" for q in ("anime", "video model", "photoreal portrait", "upscale", "vendor-1")],
+        "tag_filter_any": [f"/api/models?tags={','.join(popular)}&mode=any"],
+        "tag_filter_all": [f"/api/models?tags={','.join(popular)}&mode=all"],
+        "deep_offset": [f"/api/models?per_page={per_page}&page={last_page}"],
+        "deep_keyset": [f"/api/models?per_page={per_page}&after={cursor}"],
+    }
+    for name in (s for s in READ_SCENARIOS if s in scenarios):
+        urls = read_urls[name]
+        for url in urls:
+            assert client.get(url).status_code == 200, url  # warm the tag index and page cache
+        timings = []
+        statements[0] = 0
+        for i in range(repeat):
+            t0 = time.perf_counter()
+            client.get(urls[i % len(urls)])
+            timings.append(time.perf_counter() - t0)
+        count = statements[0]
+        peak = traced_peak(lambda: client.get(urls[0]))
+        report["scenarios"][name] = summarize(timings, count, peak)
+
+    jobs = {
+        "sync_delta": ("sync_replicate", {"mode": "delta"}),
+        "sync_full": ("sync_replicate", {"mode": "full"}),
+        "enrich": ("enrich", {"max_age": 0}),
+        "enrich_revalidate": ("enrich", {"max_age": 0}),
+    }
+    snapshot = os.path.join(workdir, "snapshot.db")
+
+    def copy_db(src: str, dst: str) -> None:
+        with server.app.app_context():
+            server.db.engine.dispose()
+        source, target = sqlite3.connect(src), sqlite3.connect(dst)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+
+    def run_job(kind: str, params: dict) -> dict:
+        with server.app.app_context():
+            job = server.enqueue_job(kind, params, os.environ["REPLICATE_API_TOKEN"])
+            job_id = job.id
+        server.run_job(job_id)
+        with server.app.app_context():
+            job = server.db.session.get(server.Job, job_id)
+            return {"status": job.status, "result": json.loads(job.result) if job.result else None, "error": job.error}
+
+    for name in (s for s in JOB_SCENARIOS if s in scenarios):
+        kind, params = jobs[name]
+        # Time the job, then rerun it from the same starting state under tracemalloc
+        copy_db(server.DB_PATH, snapshot)
+        statements[0] = 0
+        hits_before = dict(stub.hits)
+        t0 = time.perf_counter()
+        outcome = run_job(kind, params)
+        elapsed = time.perf_counter() - t0
+        count = statements[0]
+        requests_made = {k: stub.hits[k] - hits_before[k] for k in stub.hits}
+        copy_db(snapshot, server.DB_PATH)
+        peak = traced_peak(lambda: run_job(kind, params))
+        report["scenarios"][name] = summarize([elapsed], count, peak, upstream_requests=requests_made, **outcome)
+
+    stub.shutdown()
+    return report
+
+
+def git_revision() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: dict, baseline: dict) -> None:
+    """Annotate scenarios with p50 ratios against a previous report (>1 is slower)."""
+    previous = {run["models"]: run["scenarios"] for run in baseline.get("runs", [])}
+    for run in report["runs"]:
+        for name, result in run["scenarios"].items():
+            before = previous.get(run["models"], {}).get(name)
+            if before and before["p50_ms"]:
+                result["p50_vs_baseline"] = round(result["p50_ms"] / before["p50_ms"], 2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000", help="Comma-separated catalog sizes, e.g. 1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed requests per read scenario")
+    parser.add_argument("--scenarios", default=",".join(READ_SCENARIOS + JOB_SCENARIOS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    parser.add_argument("--snapshot", action="store_true", help="Serve reads from the in-memory catalog snapshot")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.snapshot:
+        os.environ["APP_CATALOG_SNAPSHOT"] = "1"  # inherited by the --single runs
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(READ_SCENARIOS + JOB_SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    if args.single:
+        print(json.dumps(run_size(sizes[0], args.repeat, scenarios, args.seed)))
+        return
+
+    runs = []
+    for size in sizes:
+        cmd = [sys.executable, "-m", "bench.api", "--single", "--sizes", str(size), "--repeat", str(args.repeat),
+               "--scenarios", ",".join(scenarios), "--seed", str(args.seed)]
+        out = subprocess.run(cmd, capture_output=True, text=True)
+        if out.returncode:
+            sys.exit(f"{size} models failed:\n{out.stderr}")
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+        print(f"{size} models done", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "catalog_snapshot": args.snapshot,
+        },
+        "runs": runs,
+    }
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            compare(report, json.load(fh))
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Synthetic Replicate catalogs for benchmarks.
+
+    python -m bench.catalog --models 10000 --out /tmp/catalog-10k.db
+    python -m bench.catalog --models 1000 --json > payloads.json
+
+Payloads look like Replicate's model listing entries. Tags are drawn from
+DEFAULT_TAGS and the raw forms in CANONICAL_MAP with a Zipf-like skew, so a
+few tags are on most models and the long tail is sparse, as in the real
+catalog. Output is deterministic for a given --seed.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+from typing import Dict, List
+
+DESCRIPTION_WORDS = [
+    "photoreal", "anime", "cartoon", "3d", "portrait", "character", "style", "upscale", "text",
+    "audio", "music", "video", "image", "fast", "high quality", "diffusion", "transformer", "lora",
+    "realistic", "face", "cinematic", "lip sync", "speech", "voice", "sdxl", "flux", "controlnet",
+]
+GENERIC_DESCRIPTION = "Model from Replicate"
+
+
+def tag_vocabulary() -> List[str]:
+    """Tag names as they appear in payloads, raw aliases included."""
+    import server
+    from tagging import CANONICAL_MAP
+
+    return sorted(set(server.DEFAULT_TAGS) | set(CANONICAL_MAP) | set(CANONICAL_MAP.values()))
+
+
+def zipf_weights(count: int, skew: float = 1.1) -> List[float]:
+    return [1 / (rank + 1) ** skew for rank in range(count)]
+
+
+def generate_payloads(count: int, seed: int = 0) -> List[dict]:
+    """`count` listing entries with skewed vendors and tags."""
+    rnd = random.Random(seed)
+    tags = tag_vocabulary()
+    rnd.shuffle(tags)
+    tag_weights = zipf_weights(len(tags))
+    vendors = [f"vendor-{i}" for i in range(max(count // 20, 10))]
+    vendor_weights = zipf_weights(len(vendors), 0.9)
+
+    payloads = []
+    for i in range(count):
+        picked = set(rnd.choices(tags, tag_weights, k=rnd.choices([1, 2, 3, 4, 5], [30, 35, 20, 10, 5])[0]))
+        if rnd.random() < 0.1:
+            description = GENERIC_DESCRIPTION  # left for enrich to fill in
+        else:
+            words = rnd.sample(DESCRIPTION_WORDS, rnd.randint(4, 10))
+            description = f"{' '.join(words).capitalize()} model #{i}"
+        payloads.append({
+            "owner": rnd.choices(vendors, vendor_weights)[0],
+            "name": f"model-{i}",
+            "description": description,
+            "cover_image_url": f"https://replicate.delivery/synthetic/{i}.png",
+            # Mixed case like upstream; the tagger lowercases
+            "tags": [t.upper() if rnd.random() < 0.05 else t for t in sorted(picked)],
+            "visibility": "public",
+        })
+    return payloads
+
+
+def upstream_changes(payloads: List[dict], changed: int, added: int, seed: int = 0) -> List[dict]:
+    """The listing a later sync would see: `added` new models and `changed`
+    edited ones first (newest first, as Replicate lists them), then the rest."""
+    rnd = random.Random(seed + 1)
+    new = generate_payloads(len(payloads) + added, seed)[len(payloads):]
+    edited = [dict(p, description=f"{p['description']} (updated {rnd.randint(1, 1 << 30)})") for p in payloads[:changed]]
+    return new[::-1] + edited + payloads[changed:]
+
+
+def populate(payloads: List[dict], page_size: int = 500) -> Dict[str, int]:
+    """Load payloads into the configured database with the bulk ingest path."""
+    import server
+
+    totals = {"created": 0, "updated": 0, "skipped": 0}
+    with server.app.app_context():
+        server.ensure_schema()
+        for start in range(0, len(payloads), page_size):
+            stats = server.ingest_replicate_models(payloads[start:start + page_size])
+            server.db.session.commit()
+            for k, v in stats.items():
+                totals[k] += v
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="SQLite file to create and fill")
+    parser.add_argument("--json", action="store_true", help="Print the payloads instead of writing a database")
+    args = parser.parse_args()
+
+    if args.json:
+        print(json.dumps(generate_payloads(args.models, args.seed)))
+        return
+    if not args.out:
+        parser.error("--out or --json is required")
+    if os.path.exists(args.out):
+        parser.error(f"{args.out} already exists")
+    os.environ["APP_DB_PATH"] = os.path.abspath(args.out)
+    print(json.dumps(populate(generate_payloads(args.models, args.seed))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Per-row vs bulk ingest of Replicate result pages.
+
+    python -m bench.ingest --models 2000 --page-size 100
+
+Runs against a throwaway SQLite file and prints timings, SQL statement counts
+and the speedup of `ingest_replicate_models` over `add_model_record` as JSON.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from typing import List
+
+TAG_POOL = [
+    "image", "video", "text-to-image", "text-to-video", "image-to-video", "music", "audio",
+    "upscaler", "style", "anime", "portrait", "3d", "lip-sync", "inpainting",
+]
+
+
+def synthetic_pages(count: int, page_size: int, seed: int = 0) -> List[List[dict]]:
+    rnd = random.Random(seed)
+    models = [
+        {
+            "owner": f"vendor{i % 97}",
+            "name": f"model-{i}",
+            "description": f"Synthetic model {i} for {' and '.join(rnd.sample(['video', 'image', 'music'], 2))}",
+            "cover_image_url": f"https://replicate.delivery/synthetic/{i}.png",
+            "tags": rnd.sample(TAG_POOL, rnd.randint(1, 4)),
+        }
+        for i in range(count)
+    ]
+    return [models[i:i + page_size] for i in range(0, count, page_size)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    os.environ["APP_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench-ingest-"), "bench.db")
+    import server
+    from sqlalchemy import event
+
+    pages = synthetic_pages(args.models, args.page_size)
+    statements = [0]
+
+    def reset() -> None:
+        server.db.session.query(server.ModelTag).delete()
+        server.db.session.query(server.Model).delete()
+        server.db.session.query(server.Tag).delete()
+        server.db.session.commit()
+        statements[0] = 0
+
+    def per_row() -> None:
+        for page in pages:
+            for payload in page:
+                vendor, name, desc, img, tags = server.replicate_model_record(payload)
+                server.add_model_record(vendor, name, tags, desc, img)
+            server.db.session.commit()
+
+    def bulk() -> None:
+        for page in pages:
+            server.ingest_replicate_models(page)
+            server.db.session.commit()
+
+    report = {"models": args.models, "page_size": args.page_size}
+    with server.app.app_context():
+        server.ensure_schema()
+        event.listen(server.db.engine, "before_cursor_execute", lambda *a: statements.__setitem__(0, statements[0] + 1))
+        for label, fn in (("per_row", per_row), ("bulk", bulk)):
+            reset()
+            started = time.perf_counter()
+            fn()
+            report[label] = {"seconds": round(time.perf_counter() - started, 4), "statements": statements[0]}
+    report["speedup"] = round(report["per_row"]["seconds"] / max(report["bulk"]["seconds"], 1e-9), 1)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Prediction gateway benchmark against the stub Replicate server.
+
+    python -m bench.predictions --clients 50 --distinct 5 --prediction-seconds 2
+
+`--clients` browsers each ask for one of `--distinct` inputs through a live
+server and follow the prediction's SSE stream until it finishes; then they
+all ask again, which the output cache answers. Reports time to result and
+the upstream requests the gateway made, next to what the same clients would
+have made creating predictions themselves and polling once a second, as
+replicate-api.js used to.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from bench.api import percentile
+
+
+def follow(base_url: str, body: dict) -> Tuple[float, str]:
+    """Submit `body` and read its event stream to the end: (seconds, source)."""
+    import requests
+
+    started = time.perf_counter()
+    resp = requests.post(f"{base_url}/api/predictions", json=body, timeout=30)
+    resp.raise_for_status()
+    prediction = resp.json()
+    if prediction["status"] not in ("succeeded", "failed", "canceled"):
+        with requests.get(f"{base_url}/api/predictions/{prediction['id']}/events", stream=True, timeout=60) as events:
+            for line in events.iter_lines(decode_unicode=True):
+                if line.startswith("data: ") and json.loads(line[6:])["status"] in ("succeeded", "failed", "canceled"):
+                    break
+    return time.perf_counter() - started, prediction["source"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--distinct", type=int, default=5, help="Different inputs among the clients")
+    parser.add_argument("--prediction-seconds", type=float, default=2.0)
+    parser.add_argument("--max-per-model", type=int, default=4)
+    args = parser.parse_args()
+
+    from bench.stub import StubReplicate
+
+    stub = StubReplicate(prediction_seconds=args.prediction_seconds).start()
+    os.environ.update({
+        "APP_DB_PATH": os.path.join(tempfile.mkdtemp(prefix="bench-predictions-"), "bench.db"),
+        "REPLICATE_API_BASE": stub.base_url,
+        "REPLICATE_API_TOKEN": "bench",
+        "REPLICATE_RATE_LIMIT": "0",
+        "PREDICTION_MAX_PER_MODEL": str(args.max_per_model),
+        "PREDICTION_MODELS": "bench/echo",
+    })
+
+    from werkzeug.serving import make_server
+
+    import server
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    http = make_server("127.0.0.1", 0, server.create_app(), threaded=True)
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{http.server_port}"
+
+    bodies = [
+        {"model": "bench/echo", "input": {"prompt": f"prompt {i % args.distinct}"}}
+        for i in range(args.clients)
+    ]
+    report = {"clients": args.clients, "distinct": args.distinct, "prediction_seconds": args.prediction_seconds, "rounds": {}}
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        for name in ("cold", "cached"):
+            before = dict(stub.hits)
+            results: List[Tuple[float, str]] = list(pool.map(lambda b: follow(base_url, b), bodies))
+            timings = [seconds for seconds, _ in results]
+            sources = {}
+            for _, source in results:
+                sources[source] = sources.get(source, 0) + 1
+            report["rounds"][name] = {
+                "p50_ms": round(percentile(timings, 50) * 1000, 1),
+                "p99_ms": round(percentile(timings, 99) * 1000, 1),
+                "sources": sources,
+                "upstream_creates": stub.hits["create"] - before["create"],
+                "upstream_polls": stub.hits["prediction"] - before["prediction"],
+            }
+    # Both rounds with every client creating its own prediction and polling every second
+    report["direct_upstream_requests"] = 2 * args.clients * (1 + math.ceil(args.prediction_seconds))
+    report["gateway_upstream_requests"] = stub.hits["create"] + stub.hits["prediction"]
+    report["gateway"] = server.prediction_gateway.snapshot_stats()
+    http.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Local stand-in for the Replicate models API.
+
+    python -m bench.stub --models 1000 --port 8765
+    REPLICATE_API_BASE=http://127.0.0.1:8765/v1 REPLICATE_API_TOKEN=x flask --app server run
+
+Serves GET /v1/models (paginated with `next` links) and
+GET /v1/models/<owner>/<name> (with ETag / If-None-Match) from an in-memory
+list of payloads. Predictions are created with POST /v1/predictions or
+POST /v1/models/<owner>/<name>/predictions, report "processing" for
+--prediction-seconds and then succeed with their input echoed as output
+(GET /v1/predictions/<id>). Latency and periodic 429s can be injected to
+exercise the client's retry path.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+class StubReplicate(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        port: int = 0,
+        page_size: int = 100,
+        latency: float = 0.0,
+        throttle_every: int = 0,
+        prediction_seconds: float = 1.0,
+        retry_after: str | None = "0",
+    ):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.page_size = page_size
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.prediction_seconds = prediction_seconds
+        self.retry_after = retry_after  # Retry-After sent with 429s; None sends none
+        self.hits = {"list": 0, "model": 0, "not_modified": 0, "throttled": 0, "create": 0, "prediction": 0}
+        self.predictions: Dict[str, Tuple[float, dict]] = {}  # id -> (created, request body)
+        self._lock = threading.Lock()
+        self.load([])
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/v1"
+
+    def load(self, payloads: List[dict]) -> None:
+        """Replace the served catalog."""
+        with self._lock:
+            self.listing = list(payloads)
+            self.models: Dict[Tuple[str, str], Tuple[bytes, str]] = {}
+            for p in payloads:
+                body = json.dumps(p).encode()
+                self.models[(p["owner"], p["name"])] = (body, f'"{hashlib.sha1(body).hexdigest()}"')
+
+    def count(self, key: str) -> int:
+        with self._lock:
+            self.hits[key] += 1
+            return sum(self.hits.values())
+
+    def prediction(self, prediction_id: str) -> dict | None:
+        entry = self.predictions.get(prediction_id)
+        if entry is None:
+            return None
+        created, body = entry
+        done = time.monotonic() - created >= self.prediction_seconds
+        return {
+            "id": prediction_id,
+            "version": body.get("version"),
+            "input": body.get("input"),
+            "status": "succeeded" if done else "processing",
+            "output": body.get("input") if done else None,
+            "error": None,
+            "metrics": {"predict_time": self.prediction_seconds} if done else None,
+        }
+
+    def start(self) -> "StubReplicate":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: StubReplicate
+    # Keep-alive, and no Nagle stall between the header and body writes
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def send_json(self, body: bytes, etag: str | None = None, status: int = 200) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def throttled(self, total: int) -> bool:
+        srv = self.server
+        if not srv.throttle_every or total % srv.throttle_every:
+            return False
+        srv.count("throttled")
+        self.send_response(429)
+        if srv.retry_after is not None:
+            self.send_header("Retry-After", srv.retry_after)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        return True
+
+    def do_POST(self) -> None:
+        srv = self.server
+        parts = urlparse(self.path).path.strip("/").split("/")
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        if srv.latency:
+            time.sleep(srv.latency)
+        if parts != ["v1", "predictions"] and not (parts[:2] == ["v1", "models"] and parts[4:] == ["predictions"] and len(parts) == 5):
+            self.send_error(404)
+            return
+        if self.throttled(srv.count("create")):
+            return
+        prediction_id = uuid.uuid4().hex
+        with srv._lock:
+            srv.predictions[prediction_id] = (time.monotonic(), body)
+        self.send_json(json.dumps(srv.prediction(prediction_id)).encode(), status=201)
+
+    def do_GET(self) -> None:
+        srv = self.server
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        if srv.latency:
+            time.sleep(srv.latency)
+        if parts[:2] == ["v1", "predictions"] and len(parts) == 3:
+            if self.throttled(srv.count("prediction")):
+                return
+            prediction = srv.prediction(parts[2])
+            if prediction is None:
+                self.send_error(404)
+            else:
+                self.send_json(json.dumps(prediction).encode())
+            return
+        if parts[:2] != ["v1", "models"] or len(parts) not in (2, 4):
+            self.send_error(404)
+            return
+
+        if self.throttled(srv.count("list" if len(parts) == 2 else "model")):
+            return
+
+        if len(parts) == 2:
+            offset = int(parse_qs(url.query).get("cursor", ["0"])[0])
+            end = offset + srv.page_size
+            nxt = f"{srv.base_url}/models?cursor={end}" if end < len(srv.listing) else None
+            self.send_json(json.dumps({"results": srv.listing[offset:end], "next": nxt}).encode())
+            return
+
+        entry = srv.models.get((parts[2], parts[3]))
+        if entry is None:
+            self.send_error(404)
+            return
+        body, etag = entry
+        if self.headers.get("If-None-Match") == etag:
+            srv.count("not_modified")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_json(body, etag)
+
+
+def main() -> None:
+    from bench.catalog import generate_payloads
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--throttle-every", type=int, default=0, help="Answer every Nth request with 429")
+    parser.add_argument("--prediction-seconds", type=float, default=1.0, help="How long each prediction runs")
+    args = parser.parse_args()
+
+    srv = StubReplicate(args.port, args.page_size, args.latency, args.throttle_every, args.prediction_seconds)
+    srv.load(generate_payloads(args.models, args.seed))
+    print(f"Serving {args.models} models at {srv.base_url}")
+    srv.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""Read-only, in-memory copy of the catalog for serving /api/models and /api/tags.
+
+A snapshot is built from plain rows in one pass and never mutated; a newer
+catalog version gets a new snapshot that replaces the old one with a single
+reference swap, so requests never see a half-built index and need no locks.
+
+Layout, chosen to keep 100k+ models small and queries free of SQL:
+
+- models are `ModelRecord`s (``__slots__``) in catalog order
+  (quality_score, vendor, name, id); a model's position in that list is its
+  identity everywhere else in the snapshot
+- tags are interned: records hold a tuple of tag ids, and each tag's posting
+  list is an int bitmask over positions, so "any"/"all" filters are one big
+  integer OR/AND and the total is a popcount
+- search uses per-column token -> positions lists over lowercased,
+  diacritic-stripped text, with prefix lookups on a sorted vocabulary. It
+  matches what the FTS5 query from `fts_match_expression` matches (every word
+  as a token prefix in any column); ranking is a weighted count of matching
+  columns rather than bm25, with catalog order breaking ties. A query with no
+  word characters is a case-insensitive substring scan in catalog order, as
+  the SQL path's LIKE fallback.
+"""
+from __future__ import annotations
+
+import bisect
+import re
+import unicodedata
+from array import array
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Column weights for search ranking: vendor, name, description (as FTS_WEIGHTS)
+SEARCH_WEIGHTS = (4.0, 8.0, 1.0)
+HIDDEN_TAGS = frozenset({"replicate"})
+
+_TOKEN = re.compile(r"[^\W_]+")
+_WORD = re.compile(r"\w")  # as fts_match_expression: without one, search falls back to LIKE
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def tokens(text: str | None) -> List[str]:
+    """Words as the FTS5 unicode61 tokenizer sees them: lowercased, no diacritics."""
+    if not text:
+        return []
+    text = text.lower()
+    if not text.isascii():
+        text = "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+    return _TOKEN.findall(text)
+
+
+class ModelRecord:
+    __slots__ = ("id", "vendor", "name", "description", "image_url", "quality_score", "tag_ids")
+
+    def __init__(self, id: int, vendor: str, name: str, description: str | None,
+                 image_url: str | None, quality_score: int, tag_ids: Tuple[int, ...] = ()):
+        self.id = id
+        self.vendor = vendor
+        self.name = name
+        self.description = description
+        self.image_url = image_url
+        self.quality_score = quality_score
+        self.tag_ids = tag_ids
+
+    def sort_key(self) -> tuple:
+        return (self.quality_score, self.vendor, self.name, self.id)
+
+
+def is_ranked_search(q: str) -> bool:
+    """Whether `q` is a ranked token search rather than a substring scan."""
+    return bool(_WORD.search(q))
+
+
+def _like_regex(q: str) -> re.Pattern:
+    """`q` as SQL's `LIKE '%q%'`: "%" is any run, "_" any one character."""
+    return re.compile("".join(".*" if c == "%" else "." if c == "_" else re.escape(c) for c in q), re.DOTALL)
+
+
+def _bitmask(positions: Iterable[int], size: int) -> int:
+    buf = bytearray((size + 7) // 8)
+    for pos in positions:
+        buf[pos >> 3] |= 1 << (pos & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _select_bits(mask: int, start: int, skip: int, count: int) -> List[int]:
+    """Positions of set bits in `mask` from `start` on, skipping the first `skip`."""
+    mask >>= start
+    if skip:
+        # Smallest shift that drops exactly `skip` set bits
+        lo, hi = 0, mask.bit_length()
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if (mask & ((1 << mid) - 1)).bit_count() < skip:
+                lo = mid + 1
+            else:
+                hi = mid
+        mask >>= lo
+        start += lo
+    out: List[int] = []
+    while mask and len(out) < count:
+        low = (mask & -mask).bit_length() - 1
+        out.append(start + low)
+        mask >>= low + 1
+        start += low + 1
+    return out
+
+
+class CatalogSnapshot:
+    """All models and tags of one catalog version."""
+
+    def __init__(self, version: int, records: List[ModelRecord], tag_names: Dict[int, str]):
+        self.version = version
+        self.records = records  # catalog order
+        self.tag_names = tag_names
+        self.tag_ids = {name: tag_id for tag_id, name in tag_names.items()}
+        self.tags = [
+            {"id": tag_id, "name": name}
+            for tag_id, name in sorted(tag_names.items(), key=lambda item: item[1])
+            if name not in HIDDEN_TAGS
+        ]
+
+        positions_by_tag: Dict[int, List[int]] = {}
+        postings: Tuple[Dict[str, array], ...] = ({}, {}, {})
+        for pos, rec in enumerate(records):
+            for tag_id in rec.tag_ids:
+                positions_by_tag.setdefault(tag_id, []).append(pos)
+            for field, text in zip(postings, (rec.vendor, rec.name, rec.description)):
+                for token in set(tokens(text)):
+                    field.setdefault(token, array("I")).append(pos)
+        self.tag_masks = {tag_id: _bitmask(ps, len(records)) for tag_id, ps in positions_by_tag.items()}
+        self._postings = postings
+        self._vocabulary = sorted(set().union(*postings))
+
+    @classmethod
+    def build(
+        cls,
+        version: int,
+        model_rows: Iterable[Sequence],
+        tag_rows: Iterable[Tuple[int, str]],
+        model_tag_rows: Iterable[Tuple[int, int]],
+    ) -> "CatalogSnapshot":
+        """From (id, vendor, name, description, image_url, quality_score),
+        (tag id, name) and (model id, tag id) rows."""
+        tag_ids_by_model: Dict[int, List[int]] = {}
+        for model_id, tag_id in model_tag_rows:
+            tag_ids_by_model.setdefault(model_id, []).append(tag_id)
+        records = [
+            ModelRecord(*row, tag_ids=tuple(sorted(tag_ids_by_model.get(row[0], ()))))
+            for row in model_rows
+        ]
+        records.sort(key=ModelRecord.sort_key)
+        return cls(version, records, dict(tag_rows))
+
+    def _position_after(self, key: Sequence) -> int:
+        """Position of the last record at or before catalog-order `key` (-1 if none)."""
+        return bisect.bisect_right(self.records, tuple(key), key=ModelRecord.sort_key) - 1
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def tag_list(self, rec: ModelRecord) -> List[str]:
+        """Visible tag names of a record, in tag id order (as load_model_tags)."""
+        names = self.tag_names
+        return [names[t] for t in rec.tag_ids if names[t] not in HIDDEN_TAGS]
+
+    def match_tags(self, names: List[str], mode: str = "any") -> int:
+        """Bitmask of positions carrying all (mode="all") or any of the tags."""
+        masks = [self.tag_masks.get(self.tag_ids.get(n), 0) for n in dict.fromkeys(names)]
+        if not masks:
+            return 0
+        result = masks[0]
+        for mask in masks[1:]:
+            result = result & mask if mode == "all" else result | mask
+        return result
+
+    def _prefix_terms(self, word: str) -> List[str]:
+        vocab = self._vocabulary
+        lo = bisect.bisect_left(vocab, word)
+        hi = bisect.bisect_left(vocab, word + "\U0010ffff", lo)
+        return vocab[lo:hi]
+
+    def search(self, q: str) -> Dict[int, float]:
+        """position -> rank (lower is better) for models matching every word of `q`."""
+        words = list(dict.fromkeys(tokens(q)))
+        if not words:
+            return {}
+        scores: Dict[int, float] | None = None
+        for word in words:
+            terms = self._prefix_terms(word)
+            word_scores: Dict[int, float] = {}
+            for field, weight in zip(self._postings, SEARCH_WEIGHTS):
+                hits = set()
+                for term in terms:
+                    hits.update(field.get(term, ()))
+                for pos in hits:
+                    word_scores[pos] = word_scores.get(pos, 0.0) + weight
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {pos: s + word_scores[pos] for pos, s in scores.items() if pos in word_scores}
+            if not scores:
+                return {}
+        return {pos: -score for pos, score in scores.items()}
+
+    def scan(self, q: str) -> List[int]:
+        """Positions whose vendor, name or description contains `q`, like
+        SQLite's `lower(column) LIKE lower('%q%')` (ASCII-only case folding)."""
+        pattern = _like_regex(q.translate(_ASCII_LOWER))
+        return [
+            pos for pos, rec in enumerate(self.records)
+            if any(text and pattern.search(text.translate(_ASCII_LOWER)) for text in (rec.vendor, rec.name, rec.description))
+        ]
+
+    def query(
+        self,
+        q: str = "",
+        tags: List[str] | None = None,
+        mode: str = "any",
+        page: int = 1,
+        per_page: int = 12,
+        after: list | None = None,
+    ) -> Tuple[List[ModelRecord], List[float] | None, int]:
+        """One page of models: (records, their ranks or None, total matches).
+
+        Ordering and the `after` keyset (a decoded cursor, rank first for a
+        ranked search) follow /api/models.
+        """
+        mask = self.match_tags(tags, mode) if tags else None
+        offset = 0 if after else (page - 1) * per_page
+
+        if q and not is_ranked_search(q):
+            positions = self.scan(q)
+            if mask is not None:
+                positions = [pos for pos in positions if mask >> pos & 1]
+            start = bisect.bisect_right(positions, self._position_after(after)) if after else 0
+            window = positions[start + offset:start + offset + per_page]
+            return [self.records[pos] for pos in window], None, len(positions)
+
+        if q:
+            ranks = self.search(q)
+            if mask is not None:
+                ranks = {pos: r for pos, r in ranks.items() if mask >> pos & 1}
+            hits = sorted((r, pos) for pos, r in ranks.items())
+            start = 0
+            if after:
+                bound = (after[0], self._position_after(after[1:]) + 1)
+                start = bisect.bisect_left(hits, bound)
+            window = hits[start + offset:start + offset + per_page]
+            return [self.records[pos] for _, pos in window], [r for r, _ in window], len(hits)
+
+        start = self._position_after(after) + 1 if after else 0
+        if mask is None:
+            first = start + offset
+            return self.records[first:first + per_page], None, len(self.records)
+        positions = _select_bits(mask, start, offset, per_page)
+        return [self.records[pos] for pos in positions], None, mask.bit_count()
@@ -14,15 +14,31 @@ document.addEventListener('DOMContentLoaded', () => {
   initializeReplicateAPI();
 });
 
+// Все модели: страницы шардированного каталога (catalog/manifest.json от `flask export-static`),
+// а если его нет — models.json, как в app.js
+async function fetchAllModels() {
+  const manifestResponse = await fetch('catalog/manifest.json').catch(() => null);
+  if (manifestResponse && manifestResponse.ok) {
+    const manifest = await manifestResponse.json();
+    const pages = await Promise.all(manifest.pages.map(async (p) => {
+      const r = await fetch(`catalog/${p.file}`);
+      if (!r.ok) throw new Error(`HTTP error! status: ${r.status}`);
+      return r.json();
+    }));
+    return pages.flat();
+  }
+  const response = await fetch('models.json');
+  if (!response.ok) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+  const data = await response.json();
+  return data.items || data;
+}
+
 // Загрузка моделей
 async function loadModels() {
   try {
-    const response = await fetch('models.json');
-    if (!response.ok) {
-      throw new Error(`HTTP error! status: ${response.status}`);
-    }
-    const data = await response.json();
-    models = data.items || data;
+    models = await fetchAllModels();
     
     // Загружаем выбранную модель из localStorage
     const savedModelId = localStorage.getItem('selectedModelId');
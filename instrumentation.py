@@ -0,0 +1,256 @@
+"""Opt-in request profiling, SQL statistics and Prometheus-style metrics.
+
+Enabled with APP_INSTRUMENTATION=1. Then every request gets a Server-Timing
+header (total, sql and any named spans), SQL statements are counted and
+timed, statements slower than SLOW_QUERY_MS are logged with their EXPLAIN
+QUERY PLAN, and GET /metrics serves request, SQL, Replicate and connection
+pool metrics in the Prometheus text format. Metrics are per process.
+
+When disabled nothing is hooked: no SQLAlchemy events, no request hooks, and
+`span()` returns a shared no-op context manager.
+"""
+from __future__ import annotations
+
+import bisect
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Tuple
+
+from flask import Flask, Response, g, has_request_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import replicate_client
+
+log = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_QUERY_LOG_SIZE = 100
+
+_enabled = False
+_slow_query_ms = float("inf")
+_noop = nullcontext()
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames, self.buckets = name, help, labelnames, buckets
+        # labels -> (per-bucket counts with a trailing +Inf slot, sum)
+        self._values: Dict[tuple, Tuple[List[int], float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        with self._lock:
+            counts, total = self._values.get(labels) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[labels] = (counts, total + value)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames + ('le',), labels + (le,))} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total:.6f}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+def _labels(names: Tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+http_requests = Counter("http_requests_total", "HTTP requests by route, method and status.", ("route", "method", "status"))
+http_latency = Histogram("http_request_duration_seconds", "HTTP request latency by route.", ("route",))
+db_statements = Counter("db_statements_total", "SQL statements executed.")
+db_latency = Histogram("db_statement_duration_seconds", "SQL statement execution time.")
+db_slow = Counter("db_slow_statements_total", "SQL statements slower than SLOW_QUERY_MS.")
+replicate_requests = Counter("replicate_requests_total", "Outbound Replicate API attempts by status (0 = no response).", ("status",))
+replicate_latency = Histogram("replicate_request_duration_seconds", "Outbound Replicate API attempt latency.")
+METRICS = (http_requests, http_latency, db_statements, db_latency, db_slow, replicate_requests, replicate_latency)
+
+slow_queries: deque = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+
+
+class RequestTiming:
+    """Per-request accumulator behind the Server-Timing header."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: Dict[str, float] = {}
+        self.sql_count = 0
+        self.sql_time = 0.0
+
+    def server_timing(self) -> str:
+        parts = [f'sql;dur={self.sql_time * 1000:.2f};desc="{self.sql_count} queries"']
+        parts += [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.spans.items()]
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.2f}")
+        return ", ".join(parts)
+
+
+def _current() -> RequestTiming | None:
+    return g.get("_timing") if has_request_context() else None
+
+
+class _Span:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        timing = _current()
+        if timing is not None:
+            timing.spans[self.name] = timing.spans.get(self.name, 0.0) + time.perf_counter() - self.started
+
+
+def span(name: str):
+    """Time a block of request work under `name` in Server-Timing."""
+    return _Span(name) if _enabled else _noop
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("_query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["_query_started"].pop()
+    db_statements.inc()
+    db_latency.observe(elapsed)
+    timing = _current()
+    if timing is not None:
+        timing.sql_count += 1
+        timing.sql_time += elapsed
+    if elapsed * 1000 >= _slow_query_ms:
+        db_slow.inc()
+        _record_slow_query(conn, statement, parameters, elapsed, executemany)
+
+
+def _record_slow_query(conn, statement: str, parameters, elapsed: float, executemany: bool) -> None:
+    plan = None
+    if not executemany and statement.lstrip()[:4].upper() in ("SELE", "WITH"):
+        # Straight on the DBAPI connection so the EXPLAIN is not itself instrumented
+        try:
+            cur = conn.connection.dbapi_connection.cursor()
+            try:
+                cur.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+                plan = [row[-1] for row in cur.fetchall()]
+            finally:
+                cur.close()
+        except Exception as exc:  # the plan is best effort, never fail the query
+            plan = [f"unavailable: {exc}"]
+    entry = {
+        "at": time.time(),
+        "ms": round(elapsed * 1000, 2),
+        "statement": statement,
+        "route": request.endpoint if has_request_context() else None,
+        "plan": plan,
+    }
+    slow_queries.append(entry)
+    log.warning("Slow query (%.1f ms) %s\n  plan: %s", entry["ms"], " ".join(statement.split()), plan)
+
+
+def _observe_replicate(method: str, status: int, seconds: float) -> None:
+    replicate_requests.inc(str(status))
+    replicate_latency.observe(seconds)
+
+
+def _before_request() -> None:
+    g._timing = RequestTiming()
+
+
+def _after_request(resp: Response) -> Response:
+    timing = g.pop("_timing", None)
+    if timing is None:
+        return resp
+    resp.headers["Server-Timing"] = timing.server_timing()
+    route = request.url_rule.rule if request.url_rule else "<unmatched>"
+    http_requests.inc(route, request.method, str(resp.status_code))
+    http_latency.observe(time.perf_counter() - timing.started, route)
+    return resp
+
+
+def _teardown_request(exc) -> None:
+    # after_request is skipped for unhandled errors; count those as 500s here
+    timing = g.pop("_timing", None)
+    if timing is not None and exc is not None:
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        http_requests.inc(route, request.method, "500")
+        http_latency.observe(time.perf_counter() - timing.started, route)
+
+
+def render_metrics(pool_stats: Callable[[], Dict[str, int]] | None = None) -> str:
+    lines: List[str] = []
+    for metric in METRICS:
+        lines += metric.render()
+    if pool_stats is not None:
+        for name, value in pool_stats().items():
+            lines += [f"# TYPE db_pool_{name} gauge", f"db_pool_{name} {value}"]
+    return "\n".join(lines) + "\n"
+
+
+def init_app(app: Flask, engine: Callable[[], Engine]) -> bool:
+    """Hook instrumentation into `app` if app.config["INSTRUMENTATION"] is set.
+
+    `engine` returns the SQLAlchemy engine (read lazily, it needs an app context).
+    """
+    global _enabled, _slow_query_ms
+    if not app.config.get("INSTRUMENTATION") or _enabled:
+        return _enabled
+    _enabled = True
+    _slow_query_ms = app.config.get("SLOW_QUERY_MS", 200)
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    replicate_client.set_observer(_observe_replicate)
+    app.before_request_funcs.setdefault(None, []).insert(0, _before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+
+    def pool_stats() -> Dict[str, int]:
+        pool = engine().pool
+        stats = {}
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            fn = getattr(pool, name, None)
+            if fn is not None:
+                stats[name] = fn()
+        return stats
+
+    def metrics() -> Response:
+        return Response(render_metrics(pool_stats), mimetype="text/plain; version=0.0.4")
+
+    def slow_query_log():
+        return jsonify({"threshold_ms": _slow_query_ms, "items": list(reversed(slow_queries))})
+
+    app.add_url_rule("/metrics", "metrics", metrics)
+    app.add_url_rule("/api/admin/slow-queries", "slow_queries", slow_query_log)
+    return True
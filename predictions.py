@@ -0,0 +1,366 @@
+"""Server-side gateway for Replicate predictions.
+
+Browsers POST /api/predictions with {"model": "owner/name", "version": ...,
+"input": {...}} ("version" optional) and then follow
+GET /api/predictions/<id>/events (Server-Sent Events) or poll
+GET /api/predictions/<id>. The Replicate token stays on the server, and:
+
+- identical (model, version, input) requests in flight share one upstream
+  prediction
+- one poller thread fetches each running upstream prediction once per
+  PREDICTION_POLL_INTERVAL, however many clients watch it, and wakes all
+  of them when it changes
+- succeeded outputs are cached by input hash for PREDICTION_CACHE_TTL;
+  Replicate's output file URLs expire after an hour, so keep it below that
+- at most PREDICTION_MAX_PER_MODEL upstream predictions run per model;
+  the rest wait here with status "queued"
+
+Only models in PREDICTION_MODELS can be run: the endpoint is public and
+spends the server's credit. An entry may pin a version ("owner/name:version");
+otherwise the model's current version runs and requests may not pick one.
+
+State is per process. With several workers, run the gateway behind sticky
+sessions or in a single process, or a client may land on a worker that
+never saw its prediction.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, Iterator, Tuple
+
+from flask import Flask, Response, jsonify, request, stream_with_context
+
+from replicate_client import ReplicateClient, get_client
+
+log = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = frozenset({"succeeded", "failed", "canceled"})
+# Finished predictions stay readable by id this long
+RETENTION_SECONDS = 600
+SSE_KEEPALIVE_SECONDS = 15.0
+MODEL_NAME = re.compile(r"^[\w.-]+/[\w.-]+$")
+
+
+class GatewayUnavailable(Exception):
+    """No Replicate token is configured on the server."""
+
+
+def parse_model_allowlist(spec: str) -> Dict[str, str | None]:
+    """"owner/name[:version], ..." -> {model: pinned version or None}."""
+    allowed: Dict[str, str | None] = {}
+    for entry in (e.strip() for e in spec.split(",")):
+        if entry:
+            model, _, version = entry.partition(":")
+            allowed[model] = version or None
+    return allowed
+
+
+def input_key(model: str, version: str | None, input: dict) -> str:
+    """Hash identifying a request; key order inside `input` does not matter."""
+    raw = json.dumps([model, version, input], sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class Prediction:
+    """One gateway prediction; all mutable fields are guarded by the gateway lock."""
+
+    def __init__(self, key: str, model: str, version: str | None, input: dict, changed: threading.Condition):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.model = model
+        self.version = version
+        self.input = input
+        self.upstream_id: str | None = None
+        self.status = "queued"
+        self.output = None
+        self.error: str | None = None
+        self.metrics: dict | None = None
+        self.cached = False
+        self.created_at = time.time()
+        self.completed_at: float | None = None
+        # Bumped on every visible change; SSE streams wait on `changed` for it
+        self.revision = 0
+        self.changed = changed
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "model": self.model,
+            "version": self.version,
+            "status": self.status,
+            "output": self.output,
+            "error": self.error,
+            "metrics": self.metrics,
+            "cached": self.cached,
+            "created_at": self.created_at,
+            "completed_at": self.completed_at,
+        }
+
+
+class PredictionGateway:
+    def __init__(
+        self,
+        client: Callable[[], ReplicateClient | None],
+        poll_interval: float = 1.0,
+        max_per_model: int = 4,
+        cache_size: int = 256,
+        cache_ttl: float = 3000,
+    ):
+        self.client = client
+        self.poll_interval = poll_interval
+        self.max_per_model = max(1, max_per_model)
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._lock = threading.Lock()
+        self._predictions: Dict[str, Prediction] = {}  # id -> active or recently finished
+        self._inflight: Dict[str, Prediction] = {}  # input key -> unfinished prediction
+        self._cache: OrderedDict = OrderedDict()  # input key -> (stored at, output, metrics)
+        self._running: Dict[str, int] = {}  # model -> upstream predictions in progress
+        self._queued: Dict[str, Deque[Prediction]] = {}
+        self._poller_pid: int | None = None
+        self.stats = {"requests": 0, "created": 0, "deduplicated": 0, "cache_hits": 0, "upstream_polls": 0}
+
+    # Submission
+
+    def submit(self, model: str, version: str | None, input: dict) -> Tuple[Prediction, str]:
+        """Prediction for a request and how it was served: "created", "queued",
+        "deduplicated" or "cached"."""
+        client = self.client()
+        if client is None:
+            raise GatewayUnavailable()
+        key = input_key(model, version, input)
+        with self._lock:
+            self.stats["requests"] += 1
+            hit = self._cached(key)
+            if hit is not None:
+                self.stats["cache_hits"] += 1
+                pred = self._register(Prediction(key, model, version, None, threading.Condition(self._lock)))
+                pred.status, pred.cached = "succeeded", True
+                pred.output, pred.metrics = hit
+                pred.completed_at = time.time()
+                return pred, "cached"
+            pred = self._inflight.get(key)
+            if pred is not None:
+                self.stats["deduplicated"] += 1
+                return pred, "deduplicated"
+            pred = self._inflight[key] = self._register(Prediction(key, model, version, input, threading.Condition(self._lock)))
+            start = self._running.get(model, 0) < self.max_per_model
+            if start:
+                self._running[model] = self._running.get(model, 0) + 1
+            else:
+                self._queued.setdefault(model, deque()).append(pred)
+        self._ensure_poller()
+        if start:
+            self._start(client, pred)
+        return pred, "created" if start else "queued"
+
+    def get(self, prediction_id: str) -> Prediction | None:
+        with self._lock:
+            return self._predictions.get(prediction_id)
+
+    def _register(self, pred: Prediction) -> Prediction:
+        self._predictions[pred.id] = pred
+        return pred
+
+    def _cached(self, key: str) -> Tuple[object, dict | None] | None:
+        """(output, metrics) of a recent identical prediction."""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        stored_at, output, metrics = entry
+        if time.monotonic() - stored_at > self.cache_ttl:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return output, metrics
+
+    def _start(self, client: ReplicateClient, pred: Prediction) -> None:
+        """Create the upstream prediction; failures finish `pred` as failed."""
+        try:
+            payload = client.create_prediction(pred.model, pred.input, pred.version)
+        except Exception as exc:
+            log.warning("Replicate prediction for %s not created: %s", pred.model, exc)
+            self._apply(pred, {"status": "failed", "error": str(exc)})
+            return
+        with self._lock:
+            self.stats["created"] += 1
+            pred.upstream_id = payload.get("id")
+        self._apply(pred, payload)
+
+    # Status updates
+
+    def _apply(self, pred: Prediction, payload: dict) -> None:
+        """Merge an upstream payload into `pred`, wake its watchers, and on
+        completion free the model slot for the next queued prediction."""
+        next_pred = None
+        with self._lock:
+            if pred.status in TERMINAL_STATUSES:
+                return
+            fields = (payload.get("status") or pred.status, payload.get("output"), payload.get("error"), payload.get("metrics"))
+            if fields != (pred.status, pred.output, pred.error, pred.metrics):
+                pred.status, pred.output, pred.error, pred.metrics = fields
+                if pred.status not in TERMINAL_STATUSES and not pred.upstream_id:
+                    pred.status = "failed"  # created without an id: nothing to poll
+                    pred.error = pred.error or "Replicate returned no prediction id"
+                pred.revision += 1
+                pred.changed.notify_all()
+            if pred.status in TERMINAL_STATUSES:
+                pred.completed_at = time.time()
+                pred.input = None  # may hold base64 images; not needed once finished
+                self._inflight.pop(pred.key, None)
+                if pred.status == "succeeded" and self.cache_size > 0:
+                    self._cache[pred.key] = (time.monotonic(), pred.output, pred.metrics)
+                    self._cache.move_to_end(pred.key)
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+                next_pred = self._release_slot(pred.model)
+        if next_pred is not None:
+            client = self.client()
+            if client is None:
+                self._apply(next_pred, {"status": "failed", "error": "Replicate token is not configured"})
+            else:
+                self._start(client, next_pred)
+
+    def _release_slot(self, model: str) -> Prediction | None:
+        """Hand the finished prediction's slot to the next queued one, if any."""
+        queue = self._queued.get(model)
+        if queue:
+            pred = queue.popleft()
+            if not queue:
+                del self._queued[model]
+            return pred  # the slot passes over, the running count stays
+        self._running[model] -= 1
+        if not self._running[model]:
+            del self._running[model]
+        return None
+
+    def _ensure_poller(self) -> None:
+        # Per process: a forked worker does not inherit the parent's thread
+        if self._poller_pid == os.getpid():
+            return
+        with self._lock:
+            if self._poller_pid != os.getpid():
+                threading.Thread(target=self._poll_forever, name="prediction-poller", daemon=True).start()
+                self._poller_pid = os.getpid()
+
+    def _poll_forever(self) -> None:
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.poll_once()
+            except Exception:
+                log.exception("Prediction poll failed")
+
+    def poll_once(self) -> int:
+        """Refresh every running upstream prediction once; returns how many were polled."""
+        now = time.time()
+        with self._lock:
+            active = {p.upstream_id: p for p in self._predictions.values() if p.upstream_id and p.status not in TERMINAL_STATUSES}
+            for pred_id in [
+                pid for pid, p in self._predictions.items()
+                if p.completed_at is not None and now - p.completed_at > RETENTION_SECONDS
+            ]:
+                del self._predictions[pred_id]
+        client = self.client() if active else None
+        if client is None:
+            return 0
+        for upstream_id, payload in client.fetch_predictions(active):
+            with self._lock:
+                self.stats["upstream_polls"] += 1
+            if payload is not None:
+                self._apply(active[upstream_id], payload)
+        return len(active)
+
+    # Streaming
+
+    def events(self, pred: Prediction, keepalive: float = SSE_KEEPALIVE_SECONDS) -> Iterator[str]:
+        """Server-Sent Events: the prediction now and after every change, ending when it finishes."""
+        seen = -1
+        while True:
+            with self._lock:
+                if pred.revision == seen:
+                    pred.changed.wait(keepalive)
+                data = None if pred.revision == seen else pred.to_dict()
+                seen = pred.revision
+            if data is None:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: prediction\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+            if data["status"] in TERMINAL_STATUSES:
+                return
+
+    def snapshot_stats(self) -> dict:
+        with self._lock:
+            return dict(
+                self.stats,
+                running=sum(self._running.values()),
+                queued=sum(len(q) for q in self._queued.values()),
+                cached=len(self._cache),
+            )
+
+
+def init_app(app: Flask, token: Callable[[], str | None]) -> PredictionGateway:
+    """Register the /api/predictions routes. `token` returns the server's Replicate token."""
+    allowed = parse_model_allowlist(app.config.get("PREDICTION_MODELS", ""))
+    gateway = PredictionGateway(
+        lambda: get_client(t) if (t := token()) else None,
+        poll_interval=app.config.get("PREDICTION_POLL_INTERVAL", 1.0),
+        max_per_model=app.config.get("PREDICTION_MAX_PER_MODEL", 4),
+        cache_size=app.config.get("PREDICTION_CACHE_SIZE", 256),
+        cache_ttl=app.config.get("PREDICTION_CACHE_TTL", 3000),
+    )
+
+    def create_prediction():
+        body = request.get_json(silent=True) or {}
+        model, version, input = body.get("model"), body.get("version") or None, body.get("input")
+        if not isinstance(model, str) or not MODEL_NAME.match(model):
+            return jsonify({"error": "model must be 'owner/name'"}), 400
+        if version is not None and not isinstance(version, str):
+            return jsonify({"error": "version must be a string"}), 400
+        if not isinstance(input, dict):
+            return jsonify({"error": "input must be an object"}), 400
+        if model not in allowed:
+            return jsonify({"error": f"model {model} is not available"}), 403
+        if version is not None and version != allowed[model]:
+            return jsonify({"error": f"version {version} of {model} is not available"}), 403
+        version = allowed[model]
+        try:
+            pred, source = gateway.submit(model, version, input)
+        except GatewayUnavailable:
+            return jsonify({"error": "Replicate token is not configured"}), 503
+        data = dict(pred.to_dict(), source=source)
+        if source == "created" and pred.status == "failed":
+            return jsonify(data), 502
+        return jsonify(data), 201 if source in ("created", "queued") else 200
+
+    def get_prediction(prediction_id: str):
+        pred = gateway.get(prediction_id)
+        if pred is None:
+            return jsonify({"error": "Not found"}), 404
+        return jsonify(pred.to_dict())
+
+    def prediction_events(prediction_id: str):
+        pred = gateway.get(prediction_id)
+        if pred is None:
+            return jsonify({"error": "Not found"}), 404
+        resp = Response(stream_with_context(gateway.events(pred)), mimetype="text/event-stream")
+        resp.headers["Cache-Control"] = "no-store"
+        resp.headers["X-Accel-Buffering"] = "no"  # nginx: do not buffer the stream
+        return resp
+
+    def prediction_stats():
+        return jsonify(gateway.snapshot_stats())
+
+    app.add_url_rule("/api/predictions", "create_prediction", create_prediction, methods=["POST"])
+    app.add_url_rule("/api/predictions/<prediction_id>", "get_prediction", get_prediction)
+    app.add_url_rule("/api/predictions/<prediction_id>/events", "prediction_events", prediction_events)
+    app.add_url_rule("/api/admin/predictions", "prediction_stats", prediction_stats)
+    return gateway
@@ -3,122 +3,92 @@
 // Replicate API интеграция для GPT-4o-mini
 class ReplicateAPI {
   constructor() {
-    this.apiToken = CONFIG.REPLICATE_API_TOKEN;
-    this.baseURL = CONFIG.API_BASE_URL;
+    // Запросы идут через серверный шлюз /api/predictions: токен Replicate остаётся на сервере,
+    // одинаковые запросы объединяются, готовые ответы кешируются
+    this.gatewayURL = (CONFIG.GATEWAY_URL || '').replace(/\/$/, '');
+    // Модель (и её версию) должен разрешать PREDICTION_MODELS на сервере
     this.model = 'openai/gpt-4o-mini';
-    this.version = CONFIG.MODEL_VERSION;
+  }
+
+  buildInput(prompt, systemPrompt, imageInput) {
+    return {
+      prompt: prompt,
+      system_prompt: systemPrompt,
+      temperature: CONFIG.DEFAULT_SETTINGS.temperature,
+      max_completion_tokens: CONFIG.DEFAULT_SETTINGS.max_completion_tokens,
+      top_p: CONFIG.DEFAULT_SETTINGS.top_p,
+      presence_penalty: CONFIG.DEFAULT_SETTINGS.presence_penalty,
+      frequency_penalty: CONFIG.DEFAULT_SETTINGS.frequency_penalty,
+      messages: [],
+      image_input: imageInput
+    };
+  }
+
+  // Создание предсказания через шлюз и ожидание результата
+  async predict(input) {
+    const response = await fetch(`${this.gatewayURL}/api/predictions`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ model: this.model, input: input })
+    });
+
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+
+    const prediction = await response.json();
+    // Ответ из кеша приходит сразу готовым
+    if (prediction.status === 'succeeded') {
+      return prediction.output;
+    }
+    return await this.waitForCompletion(prediction.id);
   }
 
   // Отправка запроса к GPT-4o-mini
   async sendMessage(prompt, systemPrompt = "You are a helpful AI assistant for an AI marketplace. Help users with questions about AI models, image generation, and creative tasks. Respond in Russian.") {
     try {
-      const response = await fetch(`${this.baseURL}/predictions`, {
-        method: 'POST',
-        headers: {
-          'Authorization': `Token ${this.apiToken}`,
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          version: this.version,
-          input: {
-            prompt: prompt,
-            system_prompt: systemPrompt,
-            temperature: CONFIG.DEFAULT_SETTINGS.temperature,
-            max_completion_tokens: CONFIG.DEFAULT_SETTINGS.max_completion_tokens,
-            top_p: CONFIG.DEFAULT_SETTINGS.top_p,
-            presence_penalty: CONFIG.DEFAULT_SETTINGS.presence_penalty,
-            frequency_penalty: CONFIG.DEFAULT_SETTINGS.frequency_penalty,
-            messages: [],
-            image_input: []
-          }
-        })
-      });
-
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
-      }
-
-      const prediction = await response.json();
-      
-      // Ждем завершения обработки
-      return await this.waitForCompletion(prediction.id);
-      
+      return await this.predict(this.buildInput(prompt, systemPrompt, []));
     } catch (error) {
       console.error('Ошибка при отправке запроса к GPT-4o-mini:', error);
       throw error;
     }
   }
 
-  // Ожидание завершения обработки
-  async waitForCompletion(predictionId) {
-    const maxAttempts = 30; // Максимум 30 попыток (30 секунд)
-    let attempts = 0;
-
-    while (attempts < maxAttempts) {
-      try {
-        const response = await fetch(`${this.baseURL}/predictions/${predictionId}`, {
-          headers: {
-            'Authorization': `Token ${this.apiToken}`,
-          }
-        });
-
-        if (!response.ok) {
-          throw new Error(`HTTP error! status: ${response.status}`);
-        }
-
-        const prediction = await response.json();
-
+  // Ожидание завершения: сервер сам опрашивает Replicate и присылает статус через Server-Sent Events
+  waitForCompletion(predictionId, timeoutMs = 120000) {
+    return new Promise((resolve, reject) => {
+      const events = new EventSource(`${this.gatewayURL}/api/predictions/${predictionId}/events`);
+      const timer = setTimeout(() => {
+        events.close();
+        reject(new Error('Timeout: Prediction took too long to complete'));
+      }, timeoutMs);
+      const finish = (fn, value) => {
+        clearTimeout(timer);
+        events.close();
+        fn(value);
+      };
+
+      events.addEventListener('prediction', (event) => {
+        const prediction = JSON.parse(event.data);
         if (prediction.status === 'succeeded') {
-          return prediction.output;
-        } else if (prediction.status === 'failed') {
-          throw new Error(`Prediction failed: ${prediction.error}`);
+          finish(resolve, prediction.output);
+        } else if (prediction.status === 'failed' || prediction.status === 'canceled') {
+          finish(reject, new Error(`Prediction failed: ${prediction.error}`));
         }
-
-        // Ждем 1 секунду перед следующей проверкой
-        await new Promise(resolve => setTimeout(resolve, 1000));
-        attempts++;
-
-      } catch (error) {
-        console.error('Ошибка при проверке статуса:', error);
-        throw error;
-      }
-    }
-
-    throw new Error('Timeout: Prediction took too long to complete');
+      });
+      // EventSource переподключается сам; закрытое соединение означает, что предсказание не найдено
+      events.onerror = () => {
+        if (events.readyState === EventSource.CLOSED) {
+          finish(reject, new Error('Prediction status stream closed'));
+        }
+      };
+    });
   }
 
   // Отправка сообщения с изображением (если загружено)
   async sendMessageWithImage(prompt, imageData, systemPrompt = "You are a helpful AI assistant for an AI marketplace. Help users with questions about AI models, image generation, and creative tasks. You can also analyze uploaded images. Respond in Russian.") {
     try {
-      const response = await fetch(`${this.baseURL}/predictions`, {
-        method: 'POST',
-        headers: {
-          'Authorization': `Token ${this.apiToken}`,
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          version: this.version,
-          input: {
-            prompt: prompt,
-            system_prompt: systemPrompt,
-            temperature: CONFIG.DEFAULT_SETTINGS.temperature,
-            max_completion_tokens: CONFIG.DEFAULT_SETTINGS.max_completion_tokens,
-            top_p: CONFIG.DEFAULT_SETTINGS.top_p,
-            presence_penalty: CONFIG.DEFAULT_SETTINGS.presence_penalty,
-            frequency_penalty: CONFIG.DEFAULT_SETTINGS.frequency_penalty,
-            messages: [],
-            image_input: imageData ? [imageData] : []
-          }
-        })
-      });
-
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
-      }
-
-      const prediction = await response.json();
-      return await this.waitForCompletion(prediction.id);
-      
+      return await this.predict(this.buildInput(prompt, systemPrompt, imageData ? [imageData] : []));
     } catch (error) {
       console.error('Ошибка при отправке запроса с изображением:', error);
       throw error;
@@ -0,0 +1,297 @@
+"""Shared client for the Replicate HTTP API.
+
+One pooled `requests.Session` per client, bounded concurrency for fan-out
+fetches, a token-bucket rate limiter shared by all threads and retries with
+backoff on 429/5xx (honouring Retry-After). Point REPLICATE_API_BASE at a local
+stub server to exercise it without the real API.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, Optional, Tuple, TypeVar
+
+if TYPE_CHECKING:
+    import requests
+
+log = logging.getLogger(__name__)
+
+REPLICATE_API_BASE = os.getenv("REPLICATE_API_BASE", "https://api.replicate.com/v1").rstrip("/")
+# Defaults are conservative; Replicate allows more, but sync shares the token with the site
+DEFAULT_CONCURRENCY = int(os.getenv("REPLICATE_MAX_CONCURRENCY", 8))
+DEFAULT_RATE = float(os.getenv("REPLICATE_RATE_LIMIT", 10))  # requests per second
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+# Called as observer(method, status, seconds) after every attempt; status 0 = no response
+_observer: Callable[[str, int, float], None] | None = None
+
+
+def set_observer(fn: Callable[[str, int, float], None] | None) -> None:
+    global _observer
+    _observer = fn
+
+
+class ReplicateError(Exception):
+    """Non-retryable (or retries exhausted) error response from Replicate."""
+
+    def __init__(self, status: int, body: str):
+        super().__init__(f"Replicate API error {status}")
+        self.status = status
+        self.body = body
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+@dataclass
+class ModelFetch:
+    """Outcome of a (conditional) model fetch.
+
+    `status` is the HTTP status (200, 304, ...) or 0 if no response was received.
+    """
+    status: int
+    payload: Optional[dict] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class ReplicateClient:
+    def __init__(
+        self,
+        token: str,
+        base_url: str | None = None,
+        max_workers: int = DEFAULT_CONCURRENCY,
+        rate: float = DEFAULT_RATE,
+        max_retries: int = 4,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        timeout: float = 15.0,
+    ):
+        self.base_url = (base_url or REPLICATE_API_BASE).rstrip("/")
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.limiter = TokenBucket(rate)
+        # Imported on first use: requests adds ~100 ms to every process start
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Authorization": f"Bearer {token}", "Accept": "application/json"})
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "ReplicateClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def url(self, path: str) -> str:
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def _delay(self, attempt: int, retry_after: float | None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return min(self.backoff * (2 ** attempt), self.max_backoff) * random.uniform(0.5, 1.0)
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """Rate-limited request with retries on 429/5xx and connection errors.
+
+        Returns the final response whatever its status; raises the last
+        `requests` exception if every attempt failed to connect.
+        """
+        import requests
+
+        kwargs.setdefault("timeout", self.timeout)
+        url = self.url(path)
+        # A POST that got a 5xx or timed out reading may have taken effect: only
+        # retry it when Replicate certainly did not act on it
+        idempotent = method in ("GET", "HEAD")
+        retry_statuses = RETRY_STATUSES if idempotent else {429}
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            started = time.perf_counter()
+            try:
+                resp = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                if _observer is not None:
+                    _observer(method, 0, time.perf_counter() - started)
+                if attempt == self.max_retries or (not idempotent and isinstance(exc, requests.ReadTimeout)):
+                    raise
+                time.sleep(self._delay(attempt, None))
+                continue
+            if _observer is not None:
+                _observer(method, resp.status_code, time.perf_counter() - started)
+            if resp.status_code not in retry_statuses or attempt == self.max_retries:
+                return resp
+            delay = self._delay(attempt, parse_retry_after(resp.headers.get("Retry-After")))
+            log.info("Replicate %s %s -> %s, retrying in %.2fs", method, url, resp.status_code, delay)
+            time.sleep(delay)
+        raise AssertionError("unreachable")
+
+    def get_json(self, path: str) -> dict:
+        resp = self.request("GET", path)
+        if resp.status_code != 200:
+            raise ReplicateError(resp.status_code, resp.text)
+        return resp.json()
+
+    def get_model_conditional(
+        self, vendor: str, name: str, etag: str | None = None, last_modified: str | None = None
+    ) -> ModelFetch:
+        """Fetch a model payload, revalidating with If-None-Match / If-Modified-Since."""
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        import requests
+
+        try:
+            resp = self.request("GET", f"models/{vendor}/{name}", headers=headers)
+        except requests.RequestException as exc:
+            log.debug("Replicate model %s/%s unavailable: %s", vendor, name, exc)
+            return ModelFetch(0)
+        result = ModelFetch(resp.status_code, None, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+        if resp.status_code == 200:
+            try:
+                result.payload = resp.json()
+            except ValueError:
+                result.status = 0
+        return result
+
+    def get_model(self, vendor: str, name: str) -> Optional[dict]:
+        """Model payload, or None if Replicate does not return it."""
+        return self.get_model_conditional(vendor, name).payload
+
+    def create_prediction(self, model: str, input: dict, version: str | None = None) -> dict:
+        """Start a prediction on `version`, or on the model's current version
+        (official models). Returns the prediction payload."""
+        if version:
+            path, body = "predictions", {"version": version, "input": input}
+        else:
+            path, body = f"models/{model}/predictions", {"input": input}
+        resp = self.request("POST", path, json=body)
+        if resp.status_code not in (200, 201):
+            raise ReplicateError(resp.status_code, resp.text)
+        return resp.json()
+
+    def get_prediction(self, prediction_id: str) -> Optional[dict]:
+        """Prediction payload, or None if Replicate does not return it."""
+        import requests
+
+        try:
+            return self.get_json(f"predictions/{prediction_id}")
+        except (ReplicateError, requests.RequestException, ValueError) as exc:
+            log.debug("Replicate prediction %s unavailable: %s", prediction_id, exc)
+            return None
+
+    def fetch_predictions(self, ids: Iterable[str]) -> Iterator[Tuple[str, Optional[dict]]]:
+        """Fetch many prediction payloads concurrently, yielding in completion order."""
+        return self._fan_out(self.get_prediction, {pid: (pid,) for pid in ids})
+
+    def _fan_out(self, fn: Callable[..., V], jobs: Dict[K, tuple]) -> Iterator[Tuple[K, V]]:
+        if not jobs:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as pool:
+            futures = {pool.submit(fn, *args): key for key, args in jobs.items()}
+            for fut in as_completed(futures):
+                yield futures[fut], fut.result()
+
+    def fetch_models(self, keys: Iterable[Tuple[str, str]]) -> Iterator[Tuple[Tuple[str, str], Optional[dict]]]:
+        """Fetch many (vendor, name) payloads concurrently, yielding in completion order."""
+        return self._fan_out(self.get_model, {key: key for key in keys})
+
+    def revalidate_models(
+        self, validators: Dict[Tuple[str, str], Tuple[str | None, str | None]]
+    ) -> Iterator[Tuple[Tuple[str, str], ModelFetch]]:
+        """Conditional fetch for many models; `validators` maps key -> (etag, last_modified)."""
+        return self._fan_out(
+            self.get_model_conditional,
+            {key: (key[0], key[1], etag, modified) for key, (etag, modified) in validators.items()},
+        )
+
+    def iter_model_pages(self, start: str = "models") -> Iterator[dict]:
+        """Walk the paginated model listing, yielding each page payload."""
+        next_url: str | None = start
+        while next_url:
+            page = self.get_json(next_url)
+            yield page
+            next_url = page.get("next")
+
+
+# Tokens can come from request headers, so only the most recently used are kept
+MAX_CLIENTS = 8
+_clients: OrderedDict[str, ReplicateClient] = OrderedDict()
+_clients_lock = threading.Lock()
+
+
+def get_client(token: str) -> ReplicateClient:
+    """Process-wide client per token so connections and the rate budget are shared.
+
+    Clients are kept in an LRU of MAX_CLIENTS; an evicted client stays usable
+    by whoever holds it, and its connections close once it is garbage collected.
+    """
+    with _clients_lock:
+        client = _clients.get(token)
+        if client is None:
+            client = _clients[token] = ReplicateClient(token)
+            while len(_clients) > MAX_CLIENTS:
+                _clients.popitem(last=False)
+        else:
+            _clients.move_to_end(token)
+        return client
@@ -1,23 +1,112 @@
 from __future__ import annotations
 
+import base64
+import functools
+import hashlib
+import json
 import os
+import re
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
 
-import requests
-from flask import Flask, jsonify, request
+import click
+from flask import Flask, Response, g, jsonify, redirect, request, send_file, stream_with_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, func, text, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+import instrumentation
+import predictions
+import thumbnails
+from catalog_snapshot import CatalogSnapshot, is_ranked_search
+from replicate_client import get_client
+from tagging import enrich_tagger, payload_tagger
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, "app.db")
+DB_PATH = os.getenv("APP_DB_PATH") or os.path.join(BASE_DIR, "app.db")
 
 app = Flask(__name__)
 app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{DB_PATH}"
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-CORS(app)
+# One pool per process: request threads plus job workers share it
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", 8)),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 4)),
+    "pool_timeout": 30,
+}
+# Applied to every new SQLite connection. WAL lets readers in other processes
+# proceed while a sync or enrich job holds the write lock.
+app.config["SQLITE_PRAGMAS"] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+    "cache_size": -int(os.getenv("SQLITE_CACHE_KB", 64 * 1024)),  # negative = KiB
+    "temp_store": "MEMORY",
+}
+# Cached Replicate model payloads younger than this are used without revalidation
+app.config["REPLICATE_CACHE_TTL"] = int(os.getenv("REPLICATE_CACHE_TTL", 24 * 3600))
+app.config["JOB_WORKERS"] = int(os.getenv("JOB_WORKERS", 2))
+# Read endpoint responses: LRU entries kept per process, and browser/CDN freshness
+app.config["RESPONSE_CACHE_SIZE"] = int(os.getenv("RESPONSE_CACHE_SIZE", 512))
+app.config["CATALOG_CACHE_MAX_AGE"] = int(os.getenv("CATALOG_CACHE_MAX_AGE", 60))
+# Server-Timing, /metrics and the slow-query log; off by default
+app.config["INSTRUMENTATION"] = os.getenv("APP_INSTRUMENTATION", "").lower() in ("1", "true", "yes")
+app.config["SLOW_QUERY_MS"] = float(os.getenv("SLOW_QUERY_MS", 200))
+# Cover thumbnails (needs Pillow): disk cache location and budget, render processes
+app.config["THUMBNAIL_DIR"] = os.getenv("THUMBNAIL_DIR") or os.path.join(BASE_DIR, "thumb_cache")
+app.config["THUMBNAIL_CACHE_MB"] = int(os.getenv("THUMBNAIL_CACHE_MB", 512))
+app.config["THUMBNAIL_WORKERS"] = int(os.getenv("THUMBNAIL_WORKERS", 2))
+# Public origin of this server (e.g. https://api.example.com), for thumbnail URLs
+# in the static export; without it export shards carry no thumbnails
+app.config["THUMBNAIL_BASE_URL"] = os.getenv("THUMBNAIL_BASE_URL", "").rstrip("/")
+# Serve /api/models and /api/tags from an in-memory snapshot, refreshed after
+# local writes and when a version check (every POLL seconds) sees another
+# process's writes
+app.config["CATALOG_SNAPSHOT"] = os.getenv("APP_CATALOG_SNAPSHOT", "").lower() in ("1", "true", "yes")
+app.config["CATALOG_SNAPSHOT_POLL"] = float(os.getenv("CATALOG_SNAPSHOT_POLL", 2))
+# Prediction gateway (predictions.py): upstream status poll interval, concurrent
+# upstream predictions per model, and the output cache. Replicate output URLs
+# expire after an hour, so cached outputs must not outlive that.
+app.config["PREDICTION_POLL_INTERVAL"] = float(os.getenv("PREDICTION_POLL_INTERVAL", 1.0))
+app.config["PREDICTION_MAX_PER_MODEL"] = int(os.getenv("PREDICTION_MAX_PER_MODEL", 4))
+app.config["PREDICTION_CACHE_SIZE"] = int(os.getenv("PREDICTION_CACHE_SIZE", 256))
+app.config["PREDICTION_CACHE_TTL"] = int(os.getenv("PREDICTION_CACHE_TTL", 50 * 60))
+# Models the gateway may run ("owner/name[:version]", comma-separated), and the
+# other origins allowed to call it; it spends the server's Replicate credit
+app.config["PREDICTION_MODELS"] = os.getenv("PREDICTION_MODELS", "openai/gpt-4o-mini")
+app.config["PREDICTION_CORS_ORIGINS"] = [o.strip() for o in os.getenv("PREDICTION_CORS_ORIGINS", "").split(",") if o.strip()]
+CORS(app, resources={
+    r"/api/predictions.*": {"origins": app.config["PREDICTION_CORS_ORIGINS"]},
+    r"/api/admin/predictions": {"origins": app.config["PREDICTION_CORS_ORIGINS"]},
+    r"/.*": {"origins": "*"},
+})
 
 db = SQLAlchemy(app)
+instrumentation.init_app(app, lambda: db.engine)
+# Only the server's own token: the gateway exists so browsers never hold one
+prediction_gateway = predictions.init_app(app, lambda: os.getenv("REPLICATE_API_TOKEN"))
+
+
+@event.listens_for(Engine, "connect")
+def _configure_sqlite(dbapi_connection, _record) -> None:
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for pragma, value in app.config["SQLITE_PRAGMAS"].items():
+        cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
 
 # Models
 class Model(db.Model):
@@ -27,6 +116,19 @@ class Model(db.Model):
     name = db.Column(db.String(200), nullable=False, index=True)
     description = db.Column(db.Text, nullable=False)
     image_url = db.Column(db.String(500), nullable=False)
+    # Precomputed catalog tier (see compute_quality_score), lower sorts first
+    quality_score = db.Column(db.Integer, nullable=False, default=2, server_default="2")
+    # Unix time of the last change to the card (fields or tags); drives incremental export
+    updated_at = db.Column(db.Float, nullable=False, default=time.time, server_default="0")
+    # Set for models that came from Replicate sync: fingerprint of the synced fields
+    # and when a listing walk last saw the model upstream
+    content_hash = db.Column(db.String(40))
+    last_seen_at = db.Column(db.Float)
+
+    __table_args__ = (
+        db.Index("ix_models_catalog_order", "quality_score", "vendor", "name", "id"),
+        db.Index("ux_models_vendor_name", "vendor", "name", unique=True),
+    )
 
 class Tag(db.Model):
     __tablename__ = "tags"
@@ -38,6 +140,62 @@ class ModelTag(db.Model):
     model_id = db.Column(db.Integer, db.ForeignKey("models.id"), primary_key=True)
     tag_id = db.Column(db.Integer, db.ForeignKey("tags.id"), primary_key=True)
 
+    __table_args__ = (
+        db.Index("ix_model_tags_tag_model", "tag_id", "model_id"),
+    )
+
+class CatalogState(db.Model):
+    """Small key/value counters; "version" is bumped by every catalog write."""
+    __tablename__ = "catalog_state"
+    key = db.Column(db.String(40), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+class ReplicatePayload(db.Model):
+    """Last known Replicate model payload with its HTTP validators."""
+    __tablename__ = "replicate_payloads"
+    key = db.Column(db.String(330), primary_key=True)  # "vendor/name"
+    body = db.Column(db.Text, nullable=False)
+    etag = db.Column(db.String(200))
+    last_modified = db.Column(db.String(64))
+    fetched_at = db.Column(db.Float, nullable=False)  # unix time of last 200/304
+
+class SyncState(db.Model):
+    """Progress of listing walks per upstream source, kept across jobs."""
+    __tablename__ = "sync_state"
+    source = db.Column(db.String(40), primary_key=True)
+    cursor = db.Column(db.Text)  # next page of an unfinished full walk
+    walk_started_at = db.Column(db.Float)  # start of that walk; older last_seen_at means deleted
+    last_completed_at = db.Column(db.Float)
+    last_full_at = db.Column(db.Float)
+
+class Job(db.Model):
+    """Background sync/enrich job with progress and a JSON resume checkpoint."""
+    __tablename__ = "jobs"
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(40), nullable=False)
+    status = db.Column(db.String(20), nullable=False, index=True)  # queued, running, succeeded, failed, cancelled
+    params = db.Column(db.Text, nullable=False, default="{}")
+    checkpoint = db.Column(db.Text)
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer)
+    errors = db.Column(db.Integer, nullable=False, default=0)
+    result = db.Column(db.Text)
+    error = db.Column(db.Text)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.Float, nullable=False)
+    started_at = db.Column(db.Float)
+    updated_at = db.Column(db.Float, nullable=False)  # heartbeat, bumped at every checkpoint
+    finished_at = db.Column(db.Float)
+    owner = db.Column(db.String(120))  # job_owner() of the process running it
+
+# Models processed per checkpoint, and how long a running job may go without one
+# before another process considers it abandoned and resumes it. Jobs whose
+# process on this host is gone (a restart) are resumed without waiting; every
+# process looks for such jobs every JOB_WATCH_INTERVAL seconds.
+JOB_BATCH_SIZE = 50
+JOB_STALE_SECONDS = 300
+JOB_WATCH_INTERVAL = 30
+
 # Seed helper - различные изображения для разных типов моделей
 SAMPLE_IMAGE = "https://images.unsplash.com/photo-1519681393784-d120267933ba?q=80&w=1600&auto=format&fit=crop"
 
@@ -104,14 +262,15 @@ def get_or_create_tag(name: str) -> Tag:
     db.session.flush()
     return t
 
+@functools.lru_cache(maxsize=65536)
+def _image_slot(model_key: str) -> int:
+    # Детерминированный хеш для консистентности, считается один раз на модель
+    return int(hashlib.md5(model_key.encode()).hexdigest(), 16)
+
+
 def get_image_for_model(tags: List[str], vendor: str, name: str) -> str:
     """Выбирает подходящее изображение на основе тегов модели"""
-    import hashlib
-    
-    # Создаем детерминированный хеш для консистентности
-    model_id = f"{vendor}/{name}"
-    hash_obj = hashlib.md5(model_id.encode())
-    hash_int = int(hash_obj.hexdigest(), 16)
+    hash_int = _image_slot(f"{vendor}/{name}")
     
     tag_set = set(tags)
     
@@ -134,6 +293,254 @@ def get_image_for_model(tags: List[str], vendor: str, name: str) -> str:
         return SAMPLE_IMAGE
 
 
+def catalog_version() -> int:
+    """Current catalog version; changes whenever models or their tags change."""
+    return db.session.query(CatalogState.value).filter(CatalogState.key == "version").scalar() or 0
+
+
+def bump_catalog_version() -> None:
+    """Mark the catalog as changed. Runs in the caller's transaction."""
+    db.session.execute(text(
+        "INSERT INTO catalog_state (key, value) VALUES ('version', 1) "
+        "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+    ))
+    db.session.info["catalog_changed"] = True
+
+
+class TagIndex:
+    """In-memory posting lists (tag name -> model ids) for one catalog version."""
+
+    def __init__(self, version: int, postings: Dict[str, frozenset]):
+        self.version = version
+        self.postings = postings
+
+    @classmethod
+    def load(cls, version: int) -> "TagIndex":
+        postings: Dict[str, set] = {}
+        rows = db.session.query(Tag.name, ModelTag.model_id).join(ModelTag, Tag.id == ModelTag.tag_id)
+        for name, model_id in rows:
+            postings.setdefault(name, set()).add(model_id)
+        return cls(version, {name: frozenset(ids) for name, ids in postings.items()})
+
+    def match(self, names: List[str], mode: str = "any") -> frozenset:
+        """Model ids carrying all (mode="all") or any of the given tags."""
+        lists = [self.postings.get(n, frozenset()) for n in dict.fromkeys(names)]
+        if not lists:
+            return frozenset()
+        if mode == "all":
+            # Intersect smallest first so misses exit early
+            lists.sort(key=len)
+            result = lists[0]
+            for ids in lists[1:]:
+                if not result:
+                    break
+                result = result & ids
+            return result
+        return frozenset().union(*lists)
+
+
+_tag_index: TagIndex | None = None
+_tag_index_lock = threading.Lock()
+
+
+def get_tag_index() -> TagIndex:
+    """Tag index for the current catalog version, rebuilt after writes."""
+    global _tag_index
+    version = catalog_version()
+    index = _tag_index
+    if index is None or index.version != version:
+        with _tag_index_lock:
+            index = _tag_index
+            if index is None or index.version != version:
+                index = _tag_index = TagIndex.load(version)
+    return index
+
+
+_catalog_snapshot: CatalogSnapshot | None = None
+_snapshot_lock = threading.Lock()
+_snapshot_refresh = threading.Event()
+_snapshot_pid: int | None = None
+
+
+def load_catalog_snapshot() -> CatalogSnapshot:
+    # Version first: a write landing mid-load only makes the next check rebuild again
+    version = catalog_version()
+    models = db.session.query(
+        Model.id, Model.vendor, Model.name, Model.description, Model.image_url, Model.quality_score
+    )
+    tags = db.session.query(Tag.id, Tag.name)
+    links = db.session.query(ModelTag.model_id, ModelTag.tag_id)
+    return CatalogSnapshot.build(version, models, tags, links)
+
+
+def _refresh_snapshot() -> None:
+    global _catalog_snapshot
+    with app.app_context():
+        snap = _catalog_snapshot
+        if snap is None or catalog_version() != snap.version:
+            _catalog_snapshot = load_catalog_snapshot()
+
+
+def _snapshot_poller() -> None:
+    while True:
+        try:
+            _refresh_snapshot()
+        except Exception:
+            app.logger.exception("Catalog snapshot refresh failed")
+        _snapshot_refresh.wait(app.config["CATALOG_SNAPSHOT_POLL"])
+        _snapshot_refresh.clear()
+
+
+@event.listens_for(db.session, "after_commit")
+def _catalog_committed(session) -> None:
+    if session.info.pop("catalog_changed", False):
+        _snapshot_refresh.set()
+
+
+@event.listens_for(db.session, "after_rollback")
+def _catalog_rolled_back(session) -> None:
+    session.info.pop("catalog_changed", None)
+
+
+def catalog_snapshot() -> CatalogSnapshot | None:
+    """Snapshot to answer catalog reads from, or None to query the database.
+
+    None when CATALOG_SNAPSHOT is off or the first load has not finished.
+    Starts this process's refresh thread on first use (forked workers each
+    need their own), and pins one snapshot per request so the response
+    cache key and the body agree.
+    """
+    global _snapshot_pid
+    if not app.config["CATALOG_SNAPSHOT"]:
+        return None
+    if _snapshot_pid != os.getpid():
+        with _snapshot_lock:
+            if _snapshot_pid != os.getpid():
+                threading.Thread(target=_snapshot_poller, name="catalog-snapshot", daemon=True).start()
+                _snapshot_pid = os.getpid()
+    if "catalog_snapshot" not in g:
+        g.catalog_snapshot = _catalog_snapshot
+    return g.catalog_snapshot
+
+
+def compute_quality_score(tags: List[str], description: str | None, image_url: str | None) -> int:
+    """Catalog tier for a model, lower is shown first. `tags` excludes "replicate"."""
+    tag_set = set(tags)
+    generic_desc = (description or "").strip().lower() in ("", "model from replicate")
+
+    # -2 = highest priority - модели с тегом image-generation
+    if "image-generation" in tag_set:
+        return -2
+
+    # -1 = second priority - модели с Replicate изображениями
+    if "replicate" in (image_url or ""):
+        return -1
+
+    # 0 = good cards (no 'official', meaningful tags)
+    if tags and not generic_desc and "official" not in tag_set:
+        return 0
+
+    # 1 = contains 'official' anywhere
+    if "official" in tag_set:
+        return 1
+
+    # 2 = worst (no tags OR generic desc)
+    return 2
+
+
+def _chunks(seq: List, size: int = 500):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def load_model_tags(model_ids: List[int]) -> Dict[int, List[str]]:
+    """Tag names (without "replicate") for many models in one query per 500 ids."""
+    result: Dict[int, List[str]] = {mid: [] for mid in model_ids}
+    for chunk in _chunks(list(result)):
+        rows = (
+            db.session.query(ModelTag.model_id, Tag.name)
+            .join(Tag, Tag.id == ModelTag.tag_id)
+            .filter(ModelTag.model_id.in_(chunk))
+            .order_by(ModelTag.model_id, ModelTag.tag_id)
+            .all()
+        )
+        for model_id, tag_name in rows:
+            if tag_name != "replicate":
+                result[model_id].append(tag_name)
+    return result
+
+
+def refresh_quality_scores(model_ids: Iterable[int] | None = None) -> int:
+    """Recompute stored quality tiers for the given models (all models if None)
+    and stamp their updated_at.
+
+    Must be called by every path that changes tags, description or image_url.
+    Reads plain columns and writes with one executemany UPDATE per 500 models.
+    Returns the number of rows whose tier changed.
+    """
+    query = db.session.query(Model.id, Model.description, Model.image_url, Model.quality_score)
+    if model_ids is None:
+        rows = query.all()
+    else:
+        rows = []
+        for chunk in _chunks(list(set(model_ids))):
+            rows += query.filter(Model.id.in_(chunk)).all()
+    tags_by_model = load_model_tags([r.id for r in rows])
+    now = time.time()
+    changed = 0
+    updates = []
+    for model_id, description, image_url, old_score in rows:
+        score = compute_quality_score(tags_by_model[model_id], description, image_url)
+        changed += score != old_score
+        updates.append({"id": model_id, "quality_score": score, "updated_at": now})
+    bulk_update_models(updates)
+    return changed
+
+
+def bulk_update_models(changes: List[dict]) -> None:
+    """Apply [{"id": ..., column: value, ...}] as executemany UPDATEs, one per
+    set of columns, in chunks of 500. The caller commits."""
+    groups: Dict[Tuple[str, ...], List[dict]] = {}
+    for row in changes:
+        groups.setdefault(tuple(sorted(k for k in row if k != "id")), []).append(row)
+    table = Model.__table__
+    for columns, rows in groups.items():
+        stmt = (
+            table.update()
+            .where(table.c.id == db.bindparam("b_id"))
+            .values({c: db.bindparam(f"b_{c}") for c in columns})
+        )
+        for chunk in _chunks(rows):
+            db.session.execute(stmt, [{f"b_{k}": v for k, v in row.items()} for row in chunk])
+
+
+def add_model_tags(tags_by_model: Dict[int, Iterable[str]], dry_run: bool = False) -> Dict[int, List[str]]:
+    """Attach tag names to models with one INSERT OR IGNORE per call.
+
+    Returns, per model, the names it did not have yet (the diff); with
+    `dry_run` nothing is written, not even missing tags. The caller commits.
+    """
+    existing = load_model_tags(list(tags_by_model))
+    added = {}
+    for model_id, names in tags_by_model.items():
+        new = sorted(set(names) - set(existing[model_id]))
+        if new:
+            added[model_id] = new
+    if added and not dry_run:
+        tag_ids = resolve_tag_ids(name for names in added.values() for name in names)
+        db.session.execute(
+            sqlite_insert(ModelTag.__table__).on_conflict_do_nothing(),
+            [{"model_id": model_id, "tag_id": tag_ids[name]} for model_id, names in added.items() for name in names],
+        )
+    return added
+
+
+DEMO_DESCRIPTION = (
+    "A pro version of Seedance that offers text-to-video and image-to-video support "
+    "for 5s or 10s videos, at 480p and 1080p resolution"
+)
+
+
 def add_model_record(vendor: str, name: str, tag_names: List[str], description: str | None = None, image_url: str | None = None) -> Tuple[Model, bool]:
     """Create model if not exists. Returns (model, created)."""
     found = Model.query.filter_by(vendor=vendor, name=name).first()
@@ -144,114 +551,666 @@ def add_model_record(vendor: str, name: str, tag_names: List[str], description:
     if not image_url:
         image_url = get_image_for_model(tag_names, vendor, name)
     
+    description = description or DEMO_DESCRIPTION
     m = Model(
         vendor=vendor,
         name=name,
-        description=(
-            description
-            or "A pro version of Seedance that offers text-to-video and image-to-video support for 5s or 10s videos, at 480p and 1080p resolution"
-        ),
+        description=description,
         image_url=image_url,
+        quality_score=compute_quality_score([t for t in tag_names if t != "replicate"], description, image_url),
     )
     db.session.add(m)
     db.session.flush()
     for t in tag_names:
         tag = get_or_create_tag(t)
         db.session.add(ModelTag(model_id=m.id, tag_id=tag.id))
+    bump_catalog_version()
     return m, True
 
 
-def seed():
-    if os.path.exists(DB_PATH) and Model.query.count() > 0:
-        return
-    db.drop_all()
-    db.create_all()
+def resolve_tag_ids(names: Iterable[str]) -> Dict[str, int]:
+    """name -> id for all `names`, creating missing tags; at most three statements."""
+    names = list(dict.fromkeys(names))
+    ids: Dict[str, int] = {}
+    for chunk in _chunks(names):
+        ids.update(db.session.query(Tag.name, Tag.id).filter(Tag.name.in_(chunk)).all())
+    missing = [n for n in names if n not in ids]
+    if missing:
+        db.session.execute(
+            sqlite_insert(Tag.__table__).on_conflict_do_nothing(index_elements=["name"]),
+            [{"name": n} for n in missing],
+        )
+        for chunk in _chunks(missing):
+            ids.update(db.session.query(Tag.name, Tag.id).filter(Tag.name.in_(chunk)).all())
+    return ids
+
+
+def replicate_model_record(model: dict, tag_names: List[str] | None = None) -> Tuple[str, str, str, str, List[str]]:
+    """(vendor, name, description, image_url, tags) for a Replicate model payload.
+
+    `tag_names` skips tag derivation when the caller already batch-derived them.
+    """
+    owner = model.get("owner") or "unknown"
+    name = model.get("name") or "model"
+    desc = model.get("description") or "Model from Replicate"
+    if tag_names is None:
+        tag_names = derive_tags_from_model_payload(model)
+    # Prefer Replicate cover image, else one picked by tags
+    img = model.get("cover_image_url") or model.get("cover_image") or get_image_for_model(tag_names, owner, name)
+    return owner, name, desc, img, tag_names
+
+
+def replicate_content_hash(desc: str, img: str, tag_names: List[str]) -> str:
+    """Fingerprint of the fields sync copies from a Replicate payload."""
+    raw = json.dumps([desc, img, sorted(set(tag_names))], ensure_ascii=False)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def ingest_replicate_models(payloads: List[dict], update_existing: bool = False) -> Dict[str, int]:
+    """Bulk upsert a page of Replicate model payloads. The caller commits.
+
+    Tags are resolved with one IN query, existing models with another, then
+    models and model_tags are written with executemany INSERT ... ON CONFLICT.
+    Existing models are left alone ("skipped") unless `update_existing` is set
+    and their content hash changed; new upstream tags are added, none removed.
+    Every model on the page gets last_seen_at stamped, which full syncs use to
+    detect deletions. Returns created/updated/skipped counts.
+    """
+    records = {}
+    for payload, derived in zip(payloads, payload_tagger.tags_for_payloads(payloads)):
+        vendor, name, desc, img, tag_names = replicate_model_record(payload, derived)
+        records[(vendor, name)] = (desc, img, tag_names, replicate_content_hash(desc, img, tag_names))
+    if not records:
+        return {"created": 0, "updated": 0, "skipped": 0}
+
+    existing: Dict[Tuple[str, str], Tuple[int, str, str, str | None]] = {}
+    for chunk in _chunks(list(records)):
+        rows = (
+            db.session.query(Model.vendor, Model.name, Model.id, Model.description, Model.image_url, Model.content_hash)
+            .filter(tuple_(Model.vendor, Model.name).in_(chunk))
+            .all()
+        )
+        existing.update({(v, n): (mid, d, i, h) for v, n, mid, d, i, h in rows})
+
+    def unchanged(key) -> bool:
+        _, desc, img, stored = existing[key]
+        if stored is not None:
+            return stored == records[key][3]
+        # Rows from before hashing: compare the visible fields instead
+        return (desc, img) == records[key][:2]
 
-    for name in DEFAULT_TAGS:
-        get_or_create_tag(name)
+    created = [key for key in records if key not in existing]
+    updated = [key for key in records if key in existing and update_existing and not unchanged(key)]
+    write = created + updated
+    now = time.time()
+    if write:
+        stmt = sqlite_insert(Model.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["vendor", "name"],
+            set_={
+                "description": stmt.excluded.description,
+                "image_url": stmt.excluded.image_url,
+                "content_hash": stmt.excluded.content_hash,
+                "last_seen_at": stmt.excluded.last_seen_at,
+            },
+        ) if update_existing else stmt.on_conflict_do_nothing(index_elements=["vendor", "name"])
+        db.session.execute(stmt, [
+            {
+                "vendor": vendor,
+                "name": name,
+                "description": desc,
+                "image_url": img,
+                "quality_score": compute_quality_score([t for t in tags if t != "replicate"], desc, img),
+                "content_hash": content_hash,
+                "last_seen_at": now,
+            }
+            for (vendor, name) in write
+            for desc, img, tags, content_hash in [records[(vendor, name)]]
+        ])
+
+        model_ids = {key: existing[key][0] for key in updated}
+        for chunk in _chunks(created):
+            rows = db.session.query(Model.vendor, Model.name, Model.id).filter(tuple_(Model.vendor, Model.name).in_(chunk))
+            model_ids.update({(v, n): mid for v, n, mid in rows})
+        tag_ids = resolve_tag_ids(t for key in write for t in records[key][2])
+        links = [
+            {"model_id": model_ids[key], "tag_id": tag_ids[t]}
+            for key in write if key in model_ids
+            for t in set(records[key][2])
+        ]
+        if links:
+            db.session.execute(sqlite_insert(ModelTag.__table__).on_conflict_do_nothing(), links)
+        # New rows got their tier at insert; updated ones may have gained tags too
+        refresh_quality_scores(model_ids[key] for key in updated)
+        bump_catalog_version()
+
+    # Seen but not rewritten: stamp last_seen_at, and the hash where it is known to match
+    seen = [
+        {"b_id": existing[key][0], "b_hash": records[key][3] if unchanged(key) else existing[key][3], "b_seen": now}
+        for key in records if key in existing and key not in updated
+    ]
+    if seen:
+        table = Model.__table__
+        db.session.execute(
+            table.update()
+            .where(table.c.id == db.bindparam("b_id"))
+            .values(content_hash=db.bindparam("b_hash"), last_seen_at=db.bindparam("b_seen")),
+            seen,
+        )
+    return {"created": len(created), "updated": len(updated), "skipped": len(records) - len(write)}
+
+
+def delete_unseen_replicate_models(walk_started_at: float) -> int:
+    """Delete synced models a complete Replicate walk did not see. The caller commits."""
+    stale = [
+        row[0] for row in db.session.query(Model.id).filter(
+            Model.content_hash.isnot(None),
+            (Model.last_seen_at.is_(None)) | (Model.last_seen_at < walk_started_at),
+        )
+    ]
+    for chunk in _chunks(stale):
+        ModelTag.query.filter(ModelTag.model_id.in_(chunk)).delete(synchronize_session=False)
+        Model.query.filter(Model.id.in_(chunk)).delete(synchronize_session=False)
+    if stale:
+        bump_catalog_version()
+    return len(stale)
+
+
+# Full-text search: external-content FTS5 table over models, kept in sync by triggers
+FTS_TABLE_SQL = (
+    "CREATE VIRTUAL TABLE models_fts USING fts5("
+    "vendor, name, description, content='models', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+FTS_TRIGGERS_SQL = {
+    "models_fts_ai": """
+        CREATE TRIGGER models_fts_ai AFTER INSERT ON models BEGIN
+            INSERT INTO models_fts(rowid, vendor, name, description)
+            VALUES (new.id, new.vendor, new.name, new.description);
+        END""",
+    "models_fts_ad": """
+        CREATE TRIGGER models_fts_ad AFTER DELETE ON models BEGIN
+            INSERT INTO models_fts(models_fts, rowid, vendor, name, description)
+            VALUES ('delete', old.id, old.vendor, old.name, old.description);
+        END""",
+    "models_fts_au": """
+        CREATE TRIGGER models_fts_au AFTER UPDATE OF vendor, name, description ON models BEGIN
+            INSERT INTO models_fts(models_fts, rowid, vendor, name, description)
+            VALUES ('delete', old.id, old.vendor, old.name, old.description);
+            INSERT INTO models_fts(rowid, vendor, name, description)
+            VALUES (new.id, new.vendor, new.name, new.description);
+        END""",
+}
+# bm25 column weights: vendor, name, description
+FTS_WEIGHTS = (4.0, 8.0, 1.0)
+
+_fts_enabled: bool | None = None
+
+
+def fts_enabled() -> bool:
+    """True when the models_fts index exists (SQLite built with FTS5)."""
+    global _fts_enabled
+    if _fts_enabled is None:
+        row = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'models_fts'")
+        ).first()
+        _fts_enabled = row is not None
+    return _fts_enabled
+
+
+def ensure_fts() -> bool:
+    """Create the FTS index and its triggers if missing. Returns False without FTS5."""
+    global _fts_enabled
+    existing = {
+        row[0] for row in db.session.execute(
+            text("SELECT name FROM sqlite_master WHERE name LIKE 'models_fts%'")
+        )
+    }
+    try:
+        rebuild = False
+        if "models_fts" not in existing:
+            db.session.execute(text(FTS_TABLE_SQL))
+            rebuild = True
+        for name, sql in FTS_TRIGGERS_SQL.items():
+            if name not in existing:
+                db.session.execute(text(sql))
+                rebuild = True
+        if rebuild:
+            db.session.execute(text("INSERT INTO models_fts(models_fts) VALUES ('rebuild')"))
+    except OperationalError:
+        # SQLite without FTS5: search falls back to LIKE scans. Only the failed
+        # statement is undone, the caller's transaction (and lock) stays open.
+        _fts_enabled = False
+        return False
+    _fts_enabled = True
+    return True
+
+
+def fts_match_expression(q: str) -> str | None:
+    """Turn free text into an FTS5 query: every word must match, each as a token prefix."""
+    words = re.findall(r"\w+", q.lower())
+    if not words:
+        return None
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def _migrate_base_tables() -> None:
+    db.metadata.create_all(bind=db.session.connection())
+
+
+def _migrate_model_columns() -> None:
+    columns = {row[1] for row in db.session.execute(text("PRAGMA table_info(models)"))}
+    added = []
+    for column, ddl in (
+        ("quality_score", "INTEGER NOT NULL DEFAULT 2"),
+        ("updated_at", "REAL NOT NULL DEFAULT 0"),
+        ("content_hash", "VARCHAR(40)"),
+        ("last_seen_at", "REAL"),
+    ):
+        if column not in columns:
+            db.session.execute(text(f"ALTER TABLE models ADD COLUMN {column} {ddl}"))
+            added.append(column)
+    if "quality_score" in added or "updated_at" in added:
+        refresh_quality_scores()
+
+
+def _migrate_indexes() -> None:
+    db.session.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_models_catalog_order ON models (quality_score, vendor, name, id)"
+    ))
+    # Upsert target for bulk ingest; add_model_record already kept (vendor, name) unique
+    db.session.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_models_vendor_name ON models (vendor, name)"))
+    db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_model_tags_tag_model ON model_tags (tag_id, model_id)"))
+
+
+def _migrate_catalog_version() -> None:
+    db.session.execute(text("INSERT OR IGNORE INTO catalog_state (key, value) VALUES ('version', 1)"))
+
+
+def _migrate_job_owner() -> None:
+    columns = {row[1] for row in db.session.execute(text("PRAGMA table_info(jobs)"))}
+    if "owner" not in columns:
+        db.session.execute(text("ALTER TABLE jobs ADD COLUMN owner VARCHAR(120)"))
+
+
+# (version, step). Steps are additive and idempotent, so databases from before
+# versioning (user_version 0) replay all of them safely. Append only.
+MIGRATIONS: List[Tuple[int, Callable[[], object]]] = [
+    (1, _migrate_base_tables),
+    (2, _migrate_model_columns),
+    (3, _migrate_indexes),
+    (4, _migrate_catalog_version),
+    (5, ensure_fts),
+    (6, _migrate_job_owner),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+# How long a starting process waits for another one's migrations
+MIGRATION_LOCK_TIMEOUT = 600
+
+
+def schema_version() -> int:
+    return db.session.execute(text("PRAGMA user_version")).scalar() or 0
+
+
+def ensure_schema() -> int:
+    """Apply pending migrations and return how many ran.
+
+    An up-to-date database costs one PRAGMA read. Otherwise migrations run in
+    one BEGIN IMMEDIATE transaction, so of several processes starting at once
+    one migrates and the others wait, then find nothing left to do.
+    """
+    if schema_version() >= SCHEMA_VERSION:
+        return 0
+    db.session.rollback()
+    conn = db.session.connection()
+    deadline = time.monotonic() + MIGRATION_LOCK_TIMEOUT
+    while True:
+        try:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            break
+        except OperationalError:
+            # Locked past busy_timeout: another process is still migrating
+            if time.monotonic() > deadline:
+                raise
+    try:
+        current = schema_version()
+        pending = [step for version, step in MIGRATIONS if version > current]
+        for step in pending:
+            step()
+        conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        db.session.commit()
+    except BaseException:
+        db.session.rollback()
+        raise
+    return len(pending)
+
+
+SEED_FILES = ("models_data.json", "all_models.json")
+
+
+def load_model_records(path: str) -> List[dict]:
+    """Catalog records ({vendor, name, description, image_url, tags}) from a
+    JSON array of models or an NDJSON file from /api/models/export."""
+    with open(path, encoding="utf-8") as fh:
+        body = fh.read()
+    items = json.loads(body) if body.lstrip().startswith("[") else [json.loads(line) for line in body.splitlines() if line.strip()]
+    return [{key: item.get(key) for key in ("vendor", "name", "description", "image_url", "tags")} for item in items]
+
+
+def import_models(records: Iterable[dict]) -> int:
+    """Bulk insert catalog records, skipping (vendor, name) pairs already present.
+
+    Missing images are picked by tags and missing descriptions get the demo
+    default. One executemany INSERT each for tags, models and model_tags.
+    Returns the number of models inserted. The caller commits.
+    """
+    by_key: Dict[Tuple[str, str], dict] = {}
+    for rec in records:
+        by_key.setdefault((rec["vendor"], rec["name"]), rec)
+    for chunk in _chunks(list(by_key)):
+        rows = db.session.query(Model.vendor, Model.name).filter(tuple_(Model.vendor, Model.name).in_(chunk))
+        for key in rows:
+            by_key.pop(tuple(key), None)
+    if not by_key:
+        return 0
+
+    rows = []
+    for (vendor, name), rec in by_key.items():
+        tag_names = list(dict.fromkeys(rec.get("tags") or ()))
+        description = rec.get("description") or DEMO_DESCRIPTION
+        image_url = rec.get("image_url") or get_image_for_model(tag_names, vendor, name)
+        rows.append({
+            "vendor": vendor,
+            "name": name,
+            "description": description,
+            "image_url": image_url,
+            "quality_score": compute_quality_score([t for t in tag_names if t != "replicate"], description, image_url),
+        })
+    db.session.execute(sqlite_insert(Model.__table__).on_conflict_do_nothing(index_elements=["vendor", "name"]), rows)
+
+    model_ids: Dict[Tuple[str, str], int] = {}
+    for chunk in _chunks(list(by_key)):
+        rows = db.session.query(Model.vendor, Model.name, Model.id).filter(tuple_(Model.vendor, Model.name).in_(chunk))
+        model_ids.update({(v, n): mid for v, n, mid in rows})
+    add_model_tags({model_ids[key]: rec.get("tags") or () for key, rec in by_key.items()})
+    bump_catalog_version()
+    return len(by_key)
+
+
+def seed() -> int:
+    """Fill an empty catalog with the demo models and the bundled JSON exports,
+    in one transaction. Does nothing if any model exists; returns models added."""
+    ensure_schema()
+    if db.session.query(Model.id).limit(1).first() is not None:
+        return 0
+    resolve_tag_ids(DEFAULT_TAGS)
 
     # Existing demo models
     demo = [
-        ("bytedance", "seedance-1-pro", ["text-to-video", "1080p", "multi-shot"], None, None),
-        ("bytedance", "seedance-1-lite", ["text-to-video", "image-to-video"], None, None),
-        ("openai", "sora-x", ["video-generation", "text-to-video", "1080p"], None, None),
-        ("stability", "stable-video", ["image-to-video", "lip-sync"], None, None),
-        ("meta", "vidpress", ["video-generation", "audio"], None, None),
-        ("runway", "gen3", ["text-to-video", "1080p", "lip-sync"], None, None),
-        ("nvidia", "omni-v", ["game-world-creation", "image-generation"], None, None),
-        ("google", "imagen-video", ["text-to-image", "image-to-video", "1080p"], None, None),
-        ("bytedance", "seedance-1-max", ["text-to-video", "inpainting"], None, None),
-        ("bytedance", "seedance-1-mini", ["design", "text-rendering"], None, None),
-        ("anthropic", "claude-vision-video", ["video-generation", "audio"], None, None),
-        ("xai", "grok-video", ["text-to-video", "1080p"], None, None),
-        ("ideogram", "ideogram", ["image-generation"], "Ideogram — image generation model", IMAGE_GEN_IMAGE),
-        ("google", "imagen-4", ["image-generation"], "Imagen-4 — image generation model", IMAGE_GEN_IMAGE),
-        ("black-forest-labs", "flux-kontext", ["image-generation"], "FluxKontext — image generation model", IMAGE_GEN_IMAGE),
-        ("kling", "kling-v2.1", ["video-generation", "text-to-video"], "Kling v2.1 — video generation", VIDEO_GEN_IMAGE),
-        ("minimax", "minimax-video", ["video-generation"], "Minimax Video — video generation", VIDEO_GEN_IMAGE),
-        ("bytedance", "seedance", ["video-generation", "text-to-video"], "Seedance — video generation", VIDEO_GEN_IMAGE),
-        ("google", "veo3-8s", ["video-generation"], "Veo3 (8 секунд) — video generation", VIDEO_GEN_IMAGE),
-        ("minimax", "minimax-music", ["music-generation", "audio"], "Minimax Music — music generation", MUSIC_GEN_IMAGE),
-        ("meta", "musicgen", ["music-generation", "audio"], "MusicGen — music generation", MUSIC_GEN_IMAGE),
-        ("chatterbox", "chatterbox", ["music-generation", "audio"], "Chatterbox — music generation", MUSIC_GEN_IMAGE),
+        ("bytedance", "seedance-1-pro", ["text-to-video", "1080p", "multi-shot"], None),
+        ("bytedance", "seedance-1-lite", ["text-to-video", "image-to-video"], None),
+        ("openai", "sora-x", ["video-generation", "text-to-video", "1080p"], None),
+        ("stability", "stable-video", ["image-to-video", "lip-sync"], None),
+        ("meta", "vidpress", ["video-generation", "audio"], None),
+        ("runway", "gen3", ["text-to-video", "1080p", "lip-sync"], None),
+        ("nvidia", "omni-v", ["game-world-creation", "image-generation"], None),
+        ("google", "imagen-video", ["text-to-image", "image-to-video", "1080p"], None),
+        ("bytedance", "seedance-1-max", ["text-to-video", "inpainting"], None),
+        ("bytedance", "seedance-1-mini", ["design", "text-rendering"], None),
+        ("anthropic", "claude-vision-video", ["video-generation", "audio"], None),
+        ("xai", "grok-video", ["text-to-video", "1080p"], None),
+        ("ideogram", "ideogram", ["image-generation"], "Ideogram — image generation model"),
+        ("google", "imagen-4", ["image-generation"], "Imagen-4 — image generation model"),
+        ("black-forest-labs", "flux-kontext", ["image-generation"], "FluxKontext — image generation model"),
+        ("kling", "kling-v2.1", ["video-generation", "text-to-video"], "Kling v2.1 — video generation"),
+        ("minimax", "minimax-video", ["video-generation"], "Minimax Video — video generation"),
+        ("bytedance", "seedance", ["video-generation", "text-to-video"], "Seedance — video generation"),
+        ("google", "veo3-8s", ["video-generation"], "Veo3 (8 секунд) — video generation"),
+        ("minimax", "minimax-music", ["music-generation", "audio"], "Minimax Music — music generation"),
+        ("meta", "musicgen", ["music-generation", "audio"], "MusicGen — music generation"),
+        ("chatterbox", "chatterbox", ["music-generation", "audio"], "Chatterbox — music generation"),
     ]
-    for vendor, name, tag_list, desc, img in demo:
-        add_model_record(vendor, name, tag_list, desc, img)
-
+    records = [
+        {"vendor": vendor, "name": name, "description": desc, "image_url": None, "tags": tag_list}
+        for vendor, name, tag_list, desc in demo
+    ]
+    for filename in SEED_FILES:
+        path = os.path.join(BASE_DIR, filename)
+        if os.path.exists(path):
+            records += load_model_records(path)
+    added = import_models(records)
     db.session.commit()
+    return added
 
 # Helpers to normalize tags from Replicate
-CANONICAL_MAP = {
-    "image": "image-generation",
-    "images": "image-generation",
-    "text-to-image": "text-to-image",
-    "video": "video-generation",
-    "videos": "video-generation",
-    "text-to-video": "text-to-video",
-    "image-to-video": "image-to-video",
-    "music": "music-generation",
-    "audio": "audio",
-}
 
 def derive_tags_from_model_payload(model: dict) -> List[str]:
-    tags: set[str] = set()
-    for key in ("categories", "modalities", "tags"):
-        vals = model.get(key)
-        if isinstance(vals, list):
-            for raw in vals:
-                if not isinstance(raw, str):
-                    continue
-                s = raw.strip().lower()
-                canonical = CANONICAL_MAP.get(s, s)
-                tags.add(canonical)
-    # Fallbacks by description
-    desc = (model.get("description") or "").lower()
-    if "video" in desc:
-        tags.add("video-generation")
-    if "image" in desc:
-        tags.add("image-generation")
-    if "music" in desc or "audio" in desc:
-        tags.add("music-generation")
-    return list(tags)
+    """Canonical raw tags plus category tags from the description."""
+    return payload_tagger.tags_for_payload(model)
 
 # Serializers
 
-def model_to_dict(m: Model):
-    tag_rows = db.session.query(Tag.name).join(ModelTag, Tag.id == ModelTag.tag_id).filter(ModelTag.model_id == m.id).all()
-    tags = [t[0] for t in tag_rows if t[0] != "replicate"]
-    return {
+thumbnail_cache = thumbnails.ThumbnailCache(
+    app.config["THUMBNAIL_DIR"],
+    max_bytes=app.config["THUMBNAIL_CACHE_MB"] * 1024 * 1024,
+    workers=app.config["THUMBNAIL_WORKERS"],
+) if thumbnails.available() else None
+
+
+def thumbnail_urls(m: Model, base_url: str = "") -> dict | None:
+    """src/srcset for the card image, or None to use image_url as is.
+
+    The URL embeds a hash of image_url, so a new cover gets new, immutable URLs.
+    They are relative to this server unless `base_url` is given.
+    """
+    if thumbnail_cache is None or "webp" not in thumbnail_cache.formats:
+        return None
+    if not (m.image_url or "").startswith(("http://", "https://")):
+        return None
+    base = f"{base_url}/api/thumbs/{m.id}/{thumbnails.url_key(m.image_url)[:16]}"
+    meta = {}
+    for fmt in thumbnail_cache.formats:
+        meta[f"{fmt}_srcset"] = ", ".join(f"{base}/{w}.{fmt} {w}w" for w in thumbnail_cache.widths)
+    meta["src"] = f"{base}/{thumbnail_cache.widths[len(thumbnail_cache.widths) // 2]}.webp"
+    meta["srcset"] = meta.pop("webp_srcset")
+    return meta
+
+
+def model_to_dict(m: Model, tags: List[str] | None = None, thumbnail_base: str | None = ""):
+    """Serialize one model. Pass `tags` (from load_model_tags) to avoid a query.
+
+    Thumbnail URLs are prefixed with `thumbnail_base`; None leaves them out,
+    for output read away from this server.
+    """
+    if tags is None:
+        tags = load_model_tags([m.id])[m.id]
+    d = {
         "id": m.id,
         "title": f"{m.vendor}/{m.name}",
         "vendor": m.vendor,
         "name": m.name,
         "description": m.description,
         "image_url": m.image_url,
-        "tags": tags,
     }
+    if thumbnail_base is not None:
+        d["thumbnail"] = thumbnail_urls(m, thumbnail_base)
+    d["tags"] = tags
+    return d
+
+
+def models_to_dicts(models: List[Model], thumbnail_base: str | None = "") -> List[dict]:
+    """Serialize many models with a single batched tag query."""
+    tags_by_model = load_model_tags([m.id for m in models])
+    with instrumentation.span("serialize"):
+        return [model_to_dict(m, tags_by_model[m.id], thumbnail_base) for m in models]
+
+# Search rankings a cursor can carry: SQL's bm25, or the snapshot's column
+# weights. Their ranks are not comparable, so a cursor only pages the one it came from.
+RANKING_FTS = "fts"
+RANKING_SNAPSHOT = "snapshot"
+
+
+def encode_cursor(m: Model, rank: float | None = None, ranking: str = RANKING_FTS) -> str:
+    """Opaque keyset cursor pointing just after `m` in catalog (or `ranking` search) order."""
+    key = [m.quality_score, m.vendor, m.name, m.id]
+    if rank is not None:
+        key[:0] = [ranking, rank]
+    raw = json.dumps(key, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, ranking: str | None = None) -> list | None:
+    """Keyset from `encode_cursor`, or None if malformed or not from `ranking`
+    (None: a catalog-order cursor)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        rank = []
+        if ranking is not None:
+            if key.pop(0) != ranking:
+                return None
+            rank = [float(key.pop(0))]
+        score, vendor, name, model_id = key
+        return rank + [int(score), str(vendor), str(name), int(model_id)]
+    except (ValueError, TypeError, AttributeError, IndexError):
+        return None
+
+def replicate_token() -> str:
+    """Token from the environment, else from the caller's Authorization header."""
+    return os.getenv("REPLICATE_API_TOKEN") or request.headers.get("Authorization", "").replace("Bearer ", "").strip()
+
+def fetch_model_payloads(
+    token: str | None,
+    keys: Iterable[Tuple[str, str]],
+    max_age: float | None = None,
+    cache_only: bool = False,
+) -> Dict[Tuple[str, str], dict | None]:
+    """Replicate payloads for (vendor, name) keys through the persistent cache.
+
+    Entries younger than `max_age` (default REPLICATE_CACHE_TTL) are served
+    as-is; older ones are revalidated with their ETag/Last-Modified. With
+    `cache_only` (or no token) nothing goes to the network and stale entries
+    are used. Keys with no usable payload map to None.
+    """
+    keys = list(dict.fromkeys(keys))
+    ttl = app.config["REPLICATE_CACHE_TTL"] if max_age is None else max_age
+    cached: Dict[Tuple[str, str], ReplicatePayload] = {}
+    by_id = {f"{vendor}/{name}": (vendor, name) for vendor, name in keys}
+    for chunk in _chunks(list(by_id)):
+        for row in ReplicatePayload.query.filter(ReplicatePayload.key.in_(chunk)):
+            cached[by_id[row.key]] = row
+
+    now = time.time()
+    result: Dict[Tuple[str, str], dict | None] = {key: None for key in keys}
+    stale: Dict[Tuple[str, str], Tuple[str | None, str | None]] = {}
+    for key in keys:
+        row = cached.get(key)
+        if row is not None and (cache_only or not token or now - row.fetched_at < ttl):
+            result[key] = json.loads(row.body)
+        elif not cache_only and token:
+            stale[key] = (row.etag, row.last_modified) if row else (None, None)
+
+    for key, fetched in get_client(token).revalidate_models(stale) if stale else ():
+        row = cached.get(key)
+        if fetched.status == 304 and row is not None:
+            row.fetched_at = time.time()
+        elif fetched.status == 200 and fetched.payload is not None:
+            if row is None:
+                row = ReplicatePayload(key=f"{key[0]}/{key[1]}")
+                db.session.add(row)
+            row.body = json.dumps(fetched.payload)
+            row.etag = fetched.etag
+            row.last_modified = fetched.last_modified
+            row.fetched_at = time.time()
+        elif row is None:
+            continue
+        # On errors fall back to the stale copy, if any
+        result[key] = json.loads(row.body)
+    return result
+
+
+def dry_run_arg() -> bool:
+    """?dry_run=1: report what an admin operation would change without writing."""
+    return request.args.get("dry_run", "").lower() in ("1", "true", "yes")
+
+
+def cache_args() -> Tuple[float | None, bool]:
+    """(max_age, cache_only) from the request's query string; a malformed max_age is ignored."""
+    max_age = request.args.get("max_age", type=float)
+    cache_only = request.args.get("cache_only", "").lower() in ("1", "true", "yes")
+    return max_age, cache_only
+
+class ResponseCache:
+    """Thread-safe LRU of rendered response bodies."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+_response_cache = ResponseCache(app.config["RESPONSE_CACHE_SIZE"])
+
+
+def normalized_args() -> Tuple[Tuple[str, str], ...]:
+    """Query args as a sorted tuple; `tags` order and `q` case do not matter."""
+    items = []
+    for key, value in request.args.items(multi=True):
+        value = value.strip()
+        if key == "tags":
+            value = ",".join(sorted({t for t in value.split(",") if t}))
+        elif key == "q":
+            value = value.lower()
+        items.append((key, value))
+    return tuple(sorted(items))
+
+
+def cached_catalog_response(view):
+    """Serve a read endpoint from the LRU keyed by (endpoint, args, catalog version).
+
+    Responses carry a strong ETag and Cache-Control, and If-None-Match gets 304.
+    Non-200 responses are passed through uncached.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        snap = catalog_snapshot()
+        key = (request.endpoint, normalized_args(), snap.version if snap is not None else catalog_version())
+        entry = _response_cache.get(key)
+        if entry is None:
+            resp = app.make_response(view(*args, **kwargs))
+            if resp.status_code != 200:
+                return resp
+            body = resp.get_data()
+            entry = (body, hashlib.sha256(body).hexdigest()[:32], resp.mimetype)
+            _response_cache.put(key, entry)
+        body, etag, mimetype = entry
+        resp = Response(body, mimetype=mimetype)
+        resp.set_etag(etag)
+        resp.headers["Cache-Control"] = f"public, max-age={app.config['CATALOG_CACHE_MAX_AGE']}, must-revalidate"
+        return resp.make_conditional(request)
+    return wrapper
 
 # API Endpoints
 @app.route("/api/tags")
+@cached_catalog_response
 def api_tags():
+    snap = catalog_snapshot()
+    if snap is not None:
+        return jsonify(snap.tags)
     rows = Tag.query.filter(Tag.name != "replicate").order_by(Tag.name.asc()).all()
     return jsonify([{"id": t.id, "name": t.name} for t in rows])
 
@@ -263,268 +1222,901 @@ def cleanup_replicate_tag():
     # delete relations first
     ModelTag.query.filter_by(tag_id=rep.id).delete()
     db.session.delete(rep)
+    bump_catalog_version()
     db.session.commit()
     return jsonify({"removed": 1})
 
 @app.route("/api/models")
+@cached_catalog_response
 def api_models():
     q = request.args.get("q", "").strip().lower()
     tags = request.args.get("tags", "").strip()
     tag_list = [t for t in tags.split(",") if t]
+    # any: model has at least one of the tags, all: model has every tag
+    mode = request.args.get("mode", "any").strip().lower()
+    if mode not in ("any", "all"):
+        return jsonify({"error": "mode must be 'any' or 'all'"}), 400
     page = max(int(request.args.get("page", 1)), 1)
     per_page = min(max(int(request.args.get("per_page", 12)), 1), 60)
+    after = request.args.get("after", "").strip()
+
+    snap = catalog_snapshot()
+    if snap is not None:
+        ranking = RANKING_SNAPSHOT if q and is_ranked_search(q) else None
+        key = decode_cursor(after, ranking) if after else None
+        if after and key is None:
+            return jsonify({"error": "Invalid cursor"}), 400
+        with instrumentation.span("snapshot"):
+            records, ranks, total = snap.query(q, tag_list, mode, page, per_page, key)
+            items = [model_to_dict(r, snap.tag_list(r)) for r in records]
+        next_cursor = None
+        if len(records) == per_page:
+            next_cursor = encode_cursor(records[-1], ranks[-1] if ranks else None, RANKING_SNAPSHOT)
+        return models_page(items, total, None if after else page, per_page, next_cursor)
 
     query = Model.query
+    sort_keys = [Model.quality_score, Model.vendor, Model.name, Model.id]
+    rank = None
 
     if q:
-        like = f"%{q}%"
-        query = query.filter((Model.vendor.ilike(like)) | (Model.name.ilike(like)) | (Model.description.ilike(like)))
+        match = fts_match_expression(q) if fts_enabled() else None
+        if match:
+            # Ranked full-text search, best bm25 first, catalog order breaks ties
+            fts = (
+                text(f"SELECT rowid AS id, bm25(models_fts, {', '.join(map(str, FTS_WEIGHTS))}) AS rank "
+                     "FROM models_fts WHERE models_fts MATCH :match")
+                .bindparams(match=match)
+                .columns(id=db.Integer, rank=db.Float)
+                .subquery("fts")
+            )
+            query = query.join(fts, fts.c.id == Model.id)
+            rank = fts.c.rank
+            sort_keys.insert(0, rank)
+        else:
+            like = f"%{q}%"
+            query = query.filter((Model.vendor.ilike(like)) | (Model.name.ilike(like)) | (Model.description.ilike(like)))
 
+    tagged_ids = None
     if tag_list:
-        query = query.join(ModelTag, Model.id == ModelTag.model_id).join(Tag, Tag.id == ModelTag.tag_id).filter(Tag.name.in_(tag_list)).group_by(Model.id)
-
-    # First get all IDs for sorting in Python by quality
-    total = query.count()
-    rows = query.order_by(Model.vendor.asc(), Model.name.asc()).all()
-
-    def quality_score(m: Model) -> int:
-        md = model_to_dict(m)
-        tags = md["tags"]
-        tag_set = set(tags)
-        generic_desc = (m.description or "").strip().lower() in ("", "model from replicate")
-        
-        # -2 = highest priority - модели с тегом image-generation
-        if "image-generation" in tag_set:
-            return -2
-        
-        # -1 = second priority - модели с Replicate изображениями
-        if "replicate" in (m.image_url or ""):
-            return -1
-        
-        # 0 = good cards (no 'official', meaningful tags)
-        if tags and not generic_desc and "official" not in tag_set:
-            return 0
-        
-        # 1 = contains 'official' anywhere
-        if "official" in tag_set:
-            return 1
-        
-        # 2 = worst (no tags OR generic desc)
-        return 2
-
-    rows.sort(key=quality_score)
-    # paginate after sorting
-    start = (page - 1) * per_page
-    page_rows = rows[start:start + per_page]
+        # Posting lists from the in-memory tag index, handed to SQLite as one JSON array
+        with instrumentation.span("tag_index"):
+            tagged_ids = get_tag_index().match(tag_list, mode)
+        id_list = func.json_each(json.dumps(sorted(tagged_ids))).table_valued("value")
+        query = query.filter(Model.id.in_(db.select(id_list.c.value)))
+
+    total = len(tagged_ids) if tagged_ids is not None and not q else query.order_by(None).count()
+    # Catalog order is served by ix_models_catalog_order, so a page costs O(per_page)
+    query = query.order_by(*[k.asc() for k in sort_keys])
+    if rank is not None:
+        query = query.add_columns(rank)
+
+    # Keyset pagination: `after` is the next_cursor of the previous page
+    if after:
+        key = decode_cursor(after, RANKING_FTS if rank is not None else None)
+        if key is None:
+            return jsonify({"error": "Invalid cursor"}), 400
+        query = query.filter(tuple_(*sort_keys) > tuple_(*key))
+        rows = query.limit(per_page).all()
+    else:
+        rows = query.offset((page - 1) * per_page).limit(per_page).all()
+    page_rows = [r[0] for r in rows] if rank is not None else rows
+    next_cursor = None
+    if len(rows) == per_page:
+        next_cursor = encode_cursor(page_rows[-1], rows[-1][1] if rank is not None else None)
+
+    return models_page(models_to_dicts(page_rows), total, None if after else page, per_page, next_cursor)
+
+
+def models_page(items: List[dict], total: int, page: int | None, per_page: int, next_cursor: str | None):
     return jsonify({
-        "items": [model_to_dict(m) for m in page_rows],
+        "items": items,
         "total": total,
         "page": page,
         "per_page": per_page,
         "pages": (total + per_page - 1) // per_page,
+        "next_cursor": next_cursor,
     })
 
-@app.route("/api/sync/replicate", methods=["POST"])
-def sync_replicate():
-    token = os.getenv("REPLICATE_API_TOKEN") or request.headers.get("Authorization", "").replace("Bearer ", "").strip()
-    if not token:
-        return jsonify({"error": "Missing REPLICATE_API_TOKEN"}), 400
 
-    limit = int(request.args.get("limit", 200))
-    imported = 0
-    headers = {"Authorization": f"Bearer {token}", "Accept": "application/json"}
-    next_url = "https://api.replicate.com/v1/models"
-
-    while imported < limit and next_url:
-        resp = requests.get(next_url, headers=headers, timeout=20)
-        if resp.status_code != 200:
-            return jsonify({"error": "Replicate API error", "status": resp.status_code, "body": resp.text}), 502
-        data = resp.json()
-        models = data.get("results", [])
-        next_url = data.get("next")  # absolute URL
-
-        for model in models:
-            if imported >= limit:
-                break
-            owner = model.get("owner") or "unknown"
-            name = model.get("name") or "model"
-            desc = model.get("description") or "Model from Replicate"
-            tag_names = derive_tags_from_model_payload(model)
-            # Prefer Replicate cover image
-            cover = model.get("cover_image_url") or model.get("cover_image")
-            # choose image by tags if no cover
-            img = cover or SAMPLE_IMAGE
-            if not cover:
-                if any(t in tag_names for t in ["video-generation", "text-to-video"]):
-                    img = VIDEO_GEN_IMAGE
-                elif any(t in tag_names for t in ["music-generation", "audio"]):
-                    img = MUSIC_GEN_IMAGE
-                elif any(t in tag_names for t in ["image-generation", "text-to-image"]):
-                    img = IMAGE_GEN_IMAGE
-
-            add_model_record(owner, name, tag_names, desc, img)
-            imported += 1
+EXPORT_BATCH_SIZE = 500
+
+
+@app.route("/api/models/export")
+def api_models_export():
+    """Stream the whole catalog as NDJSON, one model per line, in id order.
+
+    `since` (unix time) limits output to models changed after it. The body is
+    gzip-compressed with ?gzip=1 or when Accept-Encoding allows gzip, flushed
+    per batch. Thumbnail URLs are left out: they only resolve on this server.
+    """
+    since = request.args.get("since", type=float)
+    compress = request.args.get("gzip", "").lower() in ("1", "true", "yes") or request.accept_encodings["gzip"] > 0
+
+    query = db.select(Model.id, Model.vendor, Model.name, Model.description, Model.image_url).order_by(Model.id)
+    if since is not None:
+        query = query.where(Model.updated_at > since)
+
+    def lines():
+        # Server-side cursor in fixed-size partitions; plain rows keep the identity map empty
+        result = db.session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for rows in result.partitions():
+            yield "".join(json.dumps(d, ensure_ascii=False) + "\n" for d in models_to_dicts(rows, thumbnail_base=None)).encode()
+
+    def gzipped():
+        gz = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for chunk in lines():
+            yield gz.compress(chunk) + gz.flush(zlib.Z_SYNC_FLUSH)
+        yield gz.flush()
+
+    resp = Response(stream_with_context(gzipped() if compress else lines()), mimetype="application/x-ndjson")
+    resp.headers["X-Catalog-Version"] = str(catalog_version())
+    resp.headers["Cache-Control"] = "no-store"
+    resp.headers["Vary"] = "Accept-Encoding"
+    if compress:
+        resp.headers["Content-Encoding"] = "gzip"
+    return resp
+
+@app.route("/api/thumbs/<int:model_id>/<key>/<int:width>.<fmt>")
+def model_thumbnail(model_id: int, key: str, width: int, fmt: str):
+    """Resized cover for a model; falls back to a redirect to the original."""
+    m = db.session.get(Model, model_id)
+    if thumbnail_cache is None or m is None or not m.image_url or thumbnails.url_key(m.image_url)[:16] != key:
+        return jsonify({"error": "Not found"}), 404
+    try:
+        path = thumbnail_cache.get(m.image_url, width, fmt)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 404
+    except thumbnails.ThumbnailError as exc:
+        app.logger.warning("Thumbnail for model %s failed: %s", model_id, exc)
+        resp = redirect(m.image_url)
+        resp.headers["Cache-Control"] = "public, max-age=300"
+        return resp
+    # The file name is content-addressed; mtime is the LRU clock, so keep it out of the ETag
+    resp = send_file(path, mimetype=thumbnails.MIME_TYPES[fmt], conditional=True, etag=os.path.basename(path))
+    resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return resp
+
+# Background jobs: long sync/enrich work runs off the request thread
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobContext:
+    """Handle given to job functions for progress, checkpoints and cancellation."""
+
+    def __init__(self, job: Job, token: str | None):
+        self.job = job
+        self.token = token
+        self.params = json.loads(job.params or "{}")
+        self.checkpoint = json.loads(job.checkpoint) if job.checkpoint else {}
+
+    def require_token(self) -> str:
+        if not self.token:
+            raise RuntimeError("Missing REPLICATE_API_TOKEN")
+        return self.token
+
+    def step(self, processed: int = 0, errors: int = 0, checkpoint: dict | None = None) -> None:
+        """Commit the work done so far together with progress and the resume point."""
+        job = self.job
+        job.processed += processed
+        job.errors += errors
+        if checkpoint is not None:
+            self.checkpoint.update(checkpoint)
+            job.checkpoint = json.dumps(self.checkpoint)
+        job.updated_at = time.time()
+        db.session.commit()
+        if db.session.query(Job.cancel_requested).filter(Job.id == job.id).scalar():
+            raise JobCancelled()
+
+    def restart(self) -> None:
+        """Drop the checkpoint and progress so the job runs from the beginning."""
+        self.checkpoint = {}
+        self.job.checkpoint = None
+        self.job.processed = self.job.errors = 0
+
+    def model_batches(self, query) -> Iterator[List[Model]]:
+        """Id-ordered batches of `query`, starting after the checkpointed model id."""
+        if self.job.total is None:
+            self.job.total = query.order_by(None).count()
+        last_id = self.checkpoint.get("last_id", 0)
+        while True:
+            batch = query.filter(Model.id > last_id).order_by(Model.id).limit(JOB_BATCH_SIZE).all()
+            if not batch:
+                return
+            yield batch
+            last_id = batch[-1].id
+
+
+JOB_HANDLERS: Dict[str, Callable[[JobContext], dict]] = {}
+_job_pool: ThreadPoolExecutor | None = None
+_job_pool_lock = threading.Lock()
+# Tokens passed via Authorization header are never persisted; resumed jobs fall back to the env token
+_job_tokens: Dict[str, str] = {}
+_job_pending: set = set()  # ids submitted to this process's pool and not finished
+_job_owner: Tuple[int, str] | None = None
+
+
+def job_owner() -> str:
+    """"host:pid:boot" naming this process. The random boot part tells a
+    restarted process from its predecessor when both get the same pid, as
+    in containers; it is regenerated after a fork."""
+    global _job_owner
+    pid = os.getpid()
+    if _job_owner is None or _job_owner[0] != pid:
+        _job_owner = (pid, f"{socket.gethostname()}:{pid}:{uuid.uuid4().hex[:8]}")
+    return _job_owner[1]
+
+
+def job_owner_gone(owner: str | None) -> bool:
+    """True if `owner` was a process on this host that is no longer running."""
+    if not owner or owner == job_owner():
+        return False
+    host, pid, _ = owner.rsplit(":", 2)
+    if host != socket.gethostname():
+        return False
+    if int(pid) == os.getpid():
+        return True  # our pid, earlier boot
+    if os.name == "nt":
+        return False  # os.kill(pid, 0) would send CTRL_C_EVENT
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass  # alive, someone else's
+    return False
+
+
+def job_handler(kind: str):
+    def register(fn: Callable[[JobContext], dict]):
+        JOB_HANDLERS[kind] = fn
+        return fn
+    return register
+
 
+def job_to_dict(job: Job, brief: bool = False) -> dict:
+    """Job status for the API; `brief` (for listings) replaces a dry-run diff with its size."""
+    eta = None
+    if job.status == "running" and job.total and job.processed:
+        elapsed = time.time() - job.started_at
+        eta = round(elapsed / job.processed * max(job.total - job.processed, 0), 1)
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "processed": job.processed,
+        "total": job.total,
+        "errors": job.errors,
+        "eta_seconds": eta,
+        "checkpoint": json.loads(job.checkpoint) if job.checkpoint else None,
+        "result": _job_result(job, brief),
+        "error": job.error,
+        "cancel_requested": job.cancel_requested,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def _job_result(job: Job, brief: bool) -> dict | None:
+    if not job.result:
+        return None
+    result = json.loads(job.result)
+    if brief and "diff" in result:
+        result["diff_size"] = len(result.pop("diff"))
+    return result
+
+
+def enqueue_job(kind: str, params: dict, token: str | None = None) -> Job:
+    now = time.time()
+    job = Job(id=uuid.uuid4().hex, kind=kind, status="queued", params=json.dumps(params), created_at=now, updated_at=now)
+    db.session.add(job)
     db.session.commit()
-    return jsonify({"imported": imported})
+    if token and token != os.getenv("REPLICATE_API_TOKEN"):
+        _job_tokens[job.id] = token
+    return job
 
-@app.route("/api/sync/replicate/images", methods=["POST"])
-def sync_replicate_images():
-    """Backfill images for existing models using Replicate cover_image_url."""
-    token = os.getenv("REPLICATE_API_TOKEN") or request.headers.get("Authorization", "").replace("Bearer ", "").strip()
+
+def submit_job(job_id: str) -> None:
+    global _job_pool
+    with _job_pool_lock:
+        if job_id in _job_pending:
+            return
+        if _job_pool is None:
+            _job_pool = ThreadPoolExecutor(max_workers=app.config["JOB_WORKERS"], thread_name_prefix="job")
+        _job_pending.add(job_id)
+    _job_pool.submit(run_job, job_id)
+
+
+def run_job(job_id: str) -> None:
+    """Claim a queued job and run it to completion in a fresh app context."""
+    try:
+        with app.app_context():
+            _run_claimed_job(job_id)
+    finally:
+        with _job_pool_lock:
+            _job_pending.discard(job_id)
+
+
+def _run_claimed_job(job_id: str) -> None:
+    now = time.time()
+    claimed = (
+        Job.query.filter_by(id=job_id, status="queued")
+        .update({"status": "running", "started_at": func.coalesce(Job.started_at, now), "updated_at": now,
+                 "owner": job_owner()}, synchronize_session=False)
+    )
+    db.session.commit()
+    if not claimed:
+        return  # cancelled, finished or picked up by another worker
+    job = db.session.get(Job, job_id)
+    ctx = JobContext(job, _job_tokens.get(job_id) or os.getenv("REPLICATE_API_TOKEN") or None)
+    try:
+        if job.cancel_requested:
+            raise JobCancelled()  # asked for while its previous process was going away
+        result = JOB_HANDLERS[job.kind](ctx)
+        job.status = "succeeded"
+        job.result = json.dumps(result)
+    except JobCancelled:
+        db.session.rollback()
+        job.status = "cancelled"
+    except Exception as exc:
+        db.session.rollback()
+        app.logger.exception("Job %s (%s) failed", job.id, job.kind)
+        job.status = "failed"
+        job.error = str(exc)
+    job.finished_at = job.updated_at = time.time()
+    db.session.commit()
+    _job_tokens.pop(job_id, None)
+
+
+def resume_jobs() -> int:
+    """Requeue abandoned running jobs and submit every queued one; returns how many were submitted.
+
+    A running job is abandoned when its owner process on this host is gone,
+    or when it has gone JOB_STALE_SECONDS without a heartbeat in another process.
+    """
+    stale_before = time.time() - JOB_STALE_SECONDS
+    me = job_owner()
+    running = db.session.query(Job.id, Job.owner, Job.updated_at).filter(Job.status == "running").all()
+    for job_id, owner, updated_at in running:
+        if job_owner_gone(owner) or (owner != me and updated_at < stale_before):
+            # Only if untouched since read: the owner may have just checkpointed
+            Job.query.filter_by(id=job_id, status="running", updated_at=updated_at).update(
+                {"status": "queued"}, synchronize_session=False
+            )
+    db.session.commit()
+    ids = [row[0] for row in db.session.query(Job.id).filter_by(status="queued").order_by(Job.created_at)]
+    for job_id in ids:
+        submit_job(job_id)
+    return len(ids)
+
+
+def _job_watcher() -> None:
+    while True:
+        time.sleep(JOB_WATCH_INTERVAL)
+        try:
+            with app.app_context():
+                resume_jobs()
+        except Exception:
+            app.logger.exception("Resuming jobs failed")
+
+
+_jobs_pid: int | None = None
+
+
+@app.before_request
+def _resume_jobs_once():
+    # Done lazily so only serving processes (not the reloader parent) run
+    # workers; forked workers each start their own watcher
+    global _jobs_pid
+    if _jobs_pid != os.getpid():
+        with _job_pool_lock:
+            if _jobs_pid == os.getpid():
+                return
+            _jobs_pid = os.getpid()
+        threading.Thread(target=_job_watcher, name="job-watcher", daemon=True).start()
+        resume_jobs()
+
+
+def start_job(kind: str, params: dict, token: str | None):
+    """Enqueue `kind` and answer 202 with the job, or run it inline with ?wait=1."""
+    job = enqueue_job(kind, params, token)
+    if request.args.get("wait", "").lower() in ("1", "true", "yes"):
+        run_job(job.id)
+        db.session.refresh(job)
+        return jsonify(job_to_dict(job))
+    submit_job(job.id)
+    return jsonify(job_to_dict(job)), 202, {"Location": f"/api/jobs/{job.id}"}
+
+
+@job_handler("sync_replicate")
+def job_sync_replicate(ctx: JobContext) -> dict:
+    """Walk the Replicate model listing.
+
+    mode "limit" (default) imports up to `limit` models and skips existing ones.
+    mode "delta" upserts changed models and stops at the first page with
+    nothing new or changed. mode "full" walks everything, continuing an
+    unfinished walk from sync_state, and deletes synced models it never saw.
+    """
+    mode = ctx.params.get("mode", "limit")
+    limit = ctx.params.get("limit")
+    update_existing = mode in ("delta", "full") or ctx.params.get("update_existing", False)
+    state = db.session.get(SyncState, "replicate") or SyncState(source="replicate")
+    db.session.add(state)
+    if "next" not in ctx.checkpoint:
+        if mode == "full" and state.cursor and state.walk_started_at:
+            ctx.checkpoint.update(next=state.cursor, walk_started_at=state.walk_started_at)
+        else:
+            ctx.checkpoint.update(next="models", walk_started_at=time.time())
+    imported = ctx.checkpoint.get("imported", 0)
+    next_url = ctx.checkpoint["next"]
+    walk_started_at = ctx.checkpoint["walk_started_at"]
+    ctx.job.total = limit
+    counts = {k: ctx.checkpoint.get(k, 0) for k in ("created", "updated", "skipped", "deleted")}
+
+    # Resume from the Replicate `next` cursor saved after the last committed page
+    stopped_early = False
+    for data in get_client(ctx.require_token()).iter_model_pages(next_url) if next_url else ():
+        results = data.get("results", [])
+        page = results[:max(limit - imported, 0)] if limit is not None else results
+        stats = ingest_replicate_models(page, update_existing)
+        for k, v in stats.items():
+            counts[k] += v
+        imported += len(page)
+        next_url = data.get("next")
+        if mode == "full":
+            state.cursor = next_url
+            state.walk_started_at = walk_started_at
+        ctx.step(processed=len(page), checkpoint={"next": next_url, "imported": imported, **counts})
+        if mode == "delta" and page and stats["created"] + stats["updated"] == 0:
+            stopped_early = True
+            break
+        if limit is not None and imported >= limit:
+            break
+
+    now = time.time()
+    if mode == "full" and not next_url:
+        # Complete walk: anything synced earlier but not seen now is gone upstream
+        counts["deleted"] += delete_unseen_replicate_models(walk_started_at)
+        state.cursor = None
+        state.last_full_at = now
+    state.last_completed_at = now
+    db.session.commit()
+    return {"mode": mode, "imported": imported, "stopped_early": stopped_early, **counts}
+
+
+@app.route("/api/sync/replicate", methods=["POST"])
+def sync_replicate():
+    token = replicate_token()
     if not token:
         return jsonify({"error": "Missing REPLICATE_API_TOKEN"}), 400
-    headers = {"Authorization": f"Bearer {token}", "Accept": "application/json"}
+    mode = request.args.get("mode", "limit").strip().lower()
+    if mode not in ("limit", "delta", "full"):
+        return jsonify({"error": "mode must be 'limit', 'delta' or 'full'"}), 400
+    limit = request.args.get("limit", type=int)
+    params = {
+        "mode": mode,
+        "limit": 200 if limit is None and mode == "limit" else limit,
+        "update_existing": request.args.get("update", "").lower() in ("1", "true", "yes"),
+    }
+    return start_job("sync_replicate", params, token)
+
 
-    updated = 0
+@job_handler("sync_replicate_images")
+def job_sync_replicate_images(ctx: JobContext) -> dict:
+    if not ctx.params.get("cache_only"):
+        ctx.require_token()
+    updated = ctx.checkpoint.get("updated", 0)
     # update only models that have placeholder unsplash images
-    candidates = Model.query.all()
-    for m in candidates:
-        # skip if already seems like a replicate image (heuristic)
-        if "replicate" in (m.image_url or ""):
-            continue
-        try:
-            resp = requests.get(f"https://api.replicate.com/v1/models/{m.vendor}/{m.name}", headers=headers, timeout=15)
-            if resp.status_code != 200:
+    # (skip if already seems like a replicate image - heuristic)
+    query = Model.query.filter(~Model.image_url.contains("replicate"))
+    for batch in ctx.model_batches(query):
+        candidates = {(m.vendor, m.name): m for m in batch}
+        payloads = fetch_model_payloads(ctx.token, candidates, ctx.params.get("max_age"), ctx.params.get("cache_only"))
+        changed_ids: List[int] = []
+        for key, payload in payloads.items():
+            if payload is None:
                 continue
-            cover = resp.json().get("cover_image_url") or resp.json().get("cover_image")
+            m = candidates[key]
+            cover = payload.get("cover_image_url") or payload.get("cover_image")
             if cover and cover != m.image_url:
                 m.image_url = cover
-                updated += 1
-        except Exception:
-            continue
-    db.session.commit()
-    return jsonify({"updated": updated})
+                changed_ids.append(m.id)
+        updated += len(changed_ids)
+        refresh_quality_scores(changed_ids)
+        if changed_ids:
+            bump_catalog_version()
+        missing = sum(1 for p in payloads.values() if p is None)
+        ctx.step(processed=len(batch), errors=missing, checkpoint={"last_id": batch[-1].id, "updated": updated})
+    return {"updated": updated}
+
+
+@app.route("/api/sync/replicate/images", methods=["POST"])
+def sync_replicate_images():
+    """Backfill images for existing models using Replicate cover_image_url."""
+    token = replicate_token()
+    max_age, cache_only = cache_args()
+    if not token and not cache_only:
+        return jsonify({"error": "Missing REPLICATE_API_TOKEN"}), 400
+    return start_job("sync_replicate_images", {"max_age": max_age, "cache_only": cache_only}, token)
 
 @app.route("/api/admin/update-images", methods=["POST"])
 def update_model_images():
-    """Обновить изображения для всех моделей на основе их тегов"""
-    updated = 0
-    models = Model.query.all()
-    
-    for model in models:
-        # Получаем теги модели
-        tag_rows = db.session.query(Tag.name).join(ModelTag, Tag.id == ModelTag.tag_id).filter(ModelTag.model_id == model.id).all()
-        tags = [t[0] for t in tag_rows if t[0] != "replicate"]
-        
-        # Выбираем новое изображение на основе тегов
-        new_image = get_image_for_model(tags, model.vendor, model.name)
-        
-        if new_image != model.image_url:
-            model.image_url = new_image
-            updated += 1
-    
+    """Обновить изображения для всех моделей на основе их тегов.
+
+    ?dry_run=1 returns the changes without applying them.
+    """
+    dry_run = dry_run_arg()
+    rows = db.session.query(Model.id, Model.vendor, Model.name, Model.image_url).all()
+    # Теги всех моделей пачками, без загрузки ORM-объектов
+    tags_by_model = load_model_tags([r.id for r in rows])
+    changes = []
+    for model_id, vendor, name, image_url in rows:
+        new_image = get_image_for_model(tags_by_model[model_id], vendor, name)
+        if new_image != image_url:
+            changes.append({"id": model_id, "title": f"{vendor}/{name}", "from": image_url, "to": new_image})
+
+    if dry_run:
+        return jsonify({"updated": len(changes), "total": len(rows), "dry_run": True, "changes": changes})
+    bulk_update_models([{"id": c["id"], "image_url": c["to"]} for c in changes])
+    refresh_quality_scores(c["id"] for c in changes)
+    if changes:
+        bump_catalog_version()
     db.session.commit()
-    return jsonify({"updated": updated, "total": len(models)})
+    return jsonify({"updated": len(changes), "total": len(rows)})
+
+@job_handler("retag_missing")
+def job_retag_missing(ctx: JobContext) -> dict:
+    dry_run = ctx.params.get("dry_run", False)
+    if dry_run:
+        # Nothing was written and the diff is not checkpointed, so a resumed dry run starts over
+        ctx.restart()
+    updated = ctx.checkpoint.get("retagged_models", 0)
+    diff = []
+    # find models with no tags
+    query = db.session.query(Model.id, Model.vendor, Model.name, Model.description).filter(
+        ~Model.id.in_(db.select(ModelTag.model_id))
+    )
+    for batch in ctx.model_batches(query):
+        # Replicate payloads from the cache, revalidated concurrently if a token is present
+        payloads = fetch_model_payloads(
+            ctx.token, ((m.vendor, m.name) for m in batch), ctx.params.get("max_age"), ctx.params.get("cache_only")
+        )
+        derived = payload_tagger.tags_for_payloads([payloads.get((m.vendor, m.name)) or {} for m in batch])
+        # Text fallbacks over vendor, name and description ("minimax-video" -> video)
+        fallbacks = payload_tagger.scan_many([f"{m.vendor} {m.name} {m.description}" for m in batch])
+        new_tags = {
+            m.id: set(payload_tags) | text_tags
+            for m, payload_tags, text_tags in zip(batch, derived, fallbacks)
+            if payload_tags or text_tags
+        }
+        added = add_model_tags(new_tags, dry_run)
+        if dry_run:
+            titles = {m.id: f"{m.vendor}/{m.name}" for m in batch}
+            diff += [{"id": mid, "title": titles[mid], "tags_added": names} for mid, names in added.items()]
+        else:
+            refresh_quality_scores(added)
+            if added:
+                bump_catalog_version()
+        updated += len(added)
+        ctx.step(processed=len(batch), checkpoint={"last_id": batch[-1].id, "retagged_models": updated})
+    result = {"retagged_models": updated, "checked": ctx.job.total}
+    if dry_run:
+        result.update(dry_run=True, diff=diff)
+    return result
+
 
 @app.route("/api/admin/retag-missing", methods=["POST"])
 def retag_missing():
-    token = os.getenv("REPLICATE_API_TOKEN") or request.headers.get("Authorization", "").replace("Bearer ", "").strip()
-    headers = {"Authorization": f"Bearer {token}", "Accept": "application/json"} if token else None
+    max_age, cache_only = cache_args()
+    params = {"max_age": max_age, "cache_only": cache_only, "dry_run": dry_run_arg()}
+    return start_job("retag_missing", params, replicate_token() or None)
 
-    # find models with no tags
-    subq = db.session.query(ModelTag.model_id).subquery()
-    missing = Model.query.filter(~Model.id.in_(subq)).all()
-
-    updated = 0
-    for m in missing:
-        tag_names: List[str] = []
-        # Try Replicate API if token present
-        if headers:
+
+@job_handler("enrich")
+def job_enrich(ctx: JobContext) -> dict:
+    if not ctx.params.get("cache_only"):
+        ctx.require_token()
+    dry_run = ctx.params.get("dry_run", False)
+    if dry_run:
+        ctx.restart()  # as in job_retag_missing
+    updated = ctx.checkpoint.get("enriched", 0)
+    diff = []
+    query = db.session.query(Model.id, Model.vendor, Model.name, Model.description)
+    for batch in ctx.model_batches(query):
+        models = {(m.vendor, m.name): m for m in batch}
+        payloads = fetch_model_payloads(ctx.token, models, ctx.params.get("max_age"), ctx.params.get("cache_only"))
+        errors = 0
+        fetched = {key: payload for key, payload in payloads.items() if payload is not None}
+        # Raw tags, categories and style keywords for the whole batch in one scan
+        tags_by_key = dict(zip(fetched, enrich_tagger.tags_for_payloads(list(fetched.values()))))
+        descriptions: Dict[int, str] = {}
+        new_tags: Dict[int, set] = {}
+        for key, payload in payloads.items():
+            if payload is None:
+                errors += 1
+                continue
+            m = models[key]
             try:
-                resp = requests.get(f"https://api.replicate.com/v1/models/{m.vendor}/{m.name}", headers=headers, timeout=15)
-                if resp.status_code == 200:
-                    tag_names = derive_tags_from_model_payload(resp.json())
+                # Update description if payload has one and ours is generic/short
+                desc = (payload.get("description") or "").strip()
+                current = m.description or ""
+                if desc and (current.lower().strip() == "model from replicate" or len(current) < 40):
+                    # take first 220 chars
+                    short = desc[:220].rstrip()
+                    if short != current:
+                        descriptions[m.id] = short
+                new_tags[m.id] = set(tags_by_key[key])
+                # Add visibility/official if present
+                vis = (payload.get("visibility") or "").lower()
+                if vis in ("public", "verified", "official"):
+                    new_tags[m.id].add("official")
             except Exception:
-                pass
-        # Text fallbacks
-        text = f"{m.vendor} {m.name} {m.description}".lower()
-        if "video" in text:
-            tag_names.append("video-generation")
-        if "image" in text or "imagen" in text:
-            tag_names.append("image-generation")
-        if "music" in text or "audio" in text:
-            tag_names.append("music-generation")
-        tag_names = list({t for t in tag_names})
-        if not tag_names:
-            continue
-        for t in tag_names:
-            tag = get_or_create_tag(t)
-            db.session.add(ModelTag(model_id=m.id, tag_id=tag.id))
-        updated += 1
-    db.session.commit()
-    return jsonify({"retagged_models": updated, "checked": len(missing)})
+                errors += 1
+                continue
+        added = add_model_tags(new_tags, dry_run)
+        changed_ids = set(added) | set(descriptions)
+        if dry_run:
+            for m in batch:
+                if m.id in changed_ids:
+                    entry = {"id": m.id, "title": f"{m.vendor}/{m.name}", "tags_added": added.get(m.id, [])}
+                    if m.id in descriptions:
+                        entry["description"] = {"from": m.description, "to": descriptions[m.id]}
+                    diff.append(entry)
+        else:
+            bulk_update_models([{"id": mid, "description": d} for mid, d in descriptions.items()])
+            refresh_quality_scores(changed_ids)
+            if changed_ids:
+                bump_catalog_version()
+        updated += len(changed_ids)
+        ctx.step(processed=len(batch), errors=errors, checkpoint={"last_id": batch[-1].id, "enriched": updated})
+    result = {"enriched": updated, "checked": ctx.job.total}
+    if dry_run:
+        result.update(dry_run=True, diff=diff)
+    return result
+
 
 @app.route("/api/admin/enrich", methods=["POST"])
 def admin_enrich():
-    token = os.getenv("REPLICATE_API_TOKEN") or request.headers.get("Authorization", "").replace("Bearer ", "").strip()
-    if not token:
+    token = replicate_token()
+    max_age, cache_only = cache_args()
+    if not token and not cache_only:
         return jsonify({"error": "Missing REPLICATE_API_TOKEN"}), 400
-    headers = {"Authorization": f"Bearer {token}", "Accept": "application/json"}
-
-    KEYWORDS = {
-        "photoreal": "photoreal",
-        "photo": "photoreal",
-        "realistic": "photoreal",
-        "anime": "anime",
-        "cartoon": "cartoon",
-        "3d": "3d",
-        "portrait": "portrait",
-        "character": "characters",
-        "face": "portrait",
-        "style": "style",
-        "upscale": "upscaler",
-        "nsfw": "nsfw",
-        "text": "text-rendering",
-        "audio": "audio",
-        "music": "music-generation",
-        "video": "video-generation",
-        "image": "image-generation",
+    return start_job("enrich", {"max_age": max_age, "cache_only": cache_only, "dry_run": dry_run_arg()}, token)
+
+
+@app.route("/api/jobs")
+def api_jobs():
+    rows = Job.query.order_by(Job.created_at.desc()).limit(50).all()
+    return jsonify([job_to_dict(j, brief=True) for j in rows])
+
+
+@app.route("/api/jobs/<job_id>")
+def api_job(job_id: str):
+    job = db.session.get(Job, job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job_to_dict(job))
+
+
+@app.route("/api/jobs/<job_id>/cancel", methods=["POST"])
+def api_job_cancel(job_id: str):
+    job = db.session.get(Job, job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job.status == "queued":
+        job.status = "cancelled"
+        job.finished_at = job.updated_at = time.time()
+    elif job.status == "running":
+        # Picked up by the worker at its next checkpoint
+        job.cancel_requested = True
+    db.session.commit()
+    return jsonify(job_to_dict(job))
+
+# Static catalog export: content-hashed JSON shards for the static frontend.
+# catalog/ is served next to index.html, so a repo-hosted static site (GitHub
+# Pages) publishes a new catalog by committing catalog/ after `flask export-static`;
+# app.js and generate.js use models.json only when there is no manifest.
+
+EXPORT_DIR = os.path.join(BASE_DIR, "catalog")
+EXPORT_PAGE_SIZE = 60
+
+
+def export_thumbnail_base() -> str | None:
+    """Absolute base for thumbnail URLs in export shards, or None to leave them out."""
+    if thumbnail_cache is None or not app.config["THUMBNAIL_BASE_URL"]:
+        return None
+    return app.config["THUMBNAIL_BASE_URL"]
+
+
+def _export_thumbnail_variant(base: str | None) -> str:
+    """Everything besides (id, updated_at) that shapes a shard's thumbnail URLs."""
+    if base is None:
+        return ""
+    return f"{base}|{','.join(thumbnail_cache.formats)}|{','.join(map(str, thumbnail_cache.widths))}"
+
+
+def _shard_signature(members: List[Tuple[int, float]], variant: str = "") -> str:
+    key = ",".join(f"{mid}:{ts}" for mid, ts in members)
+    if variant:
+        key = f"{variant}#{key}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _write_shard(out_dir: str, prefix: str, model_ids: List[int], thumbnail_base: str | None = None) -> str:
+    """Serialize models in the given order to `<prefix>.<content hash>.json`; returns the relative path."""
+    by_id = {}
+    for chunk in _chunks(model_ids):
+        for m in Model.query.filter(Model.id.in_(chunk)):
+            by_id[m.id] = m
+    body = json.dumps(models_to_dicts([by_id[mid] for mid in model_ids if mid in by_id], thumbnail_base),
+                      ensure_ascii=False, separators=(",", ":")).encode()
+    rel = f"{prefix}.{hashlib.sha1(body).hexdigest()[:12]}.json"
+    path = os.path.join(out_dir, rel)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            f.write(body)
+        os.replace(path + ".tmp", path)
+    return rel
+
+
+def export_static_catalog(out_dir: str | None = None, page_size: int = EXPORT_PAGE_SIZE) -> dict:
+    """Export the catalog as page and per-tag shards plus manifest.json.
+
+    Only (id, updated_at) pairs are streamed for the whole catalog; a shard is
+    re-serialized only when its member list or a member's updated_at differs
+    from the previous manifest, or thumbnail URLs change (THUMBNAIL_BASE_URL,
+    Pillow's formats). Unreferenced shard files are removed.
+    Returns a summary with written/reused counts.
+    """
+    out_dir = out_dir or EXPORT_DIR
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    previous: dict = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            previous = json.load(f)
+    if previous.get("page_size") != page_size:
+        previous = {}
+    version = catalog_version()
+
+    order: List[Tuple[int, float]] = (
+        db.session.query(Model.id, Model.updated_at)
+        .order_by(Model.quality_score, Model.vendor, Model.name, Model.id)
+        .all()
+    )
+    position = {mid: i for i, (mid, _) in enumerate(order)}
+    stamps = dict(order)
+    thumbnail_base = export_thumbnail_base()
+    variant = _export_thumbnail_variant(thumbnail_base)
+    written = reused = 0
+
+    def shard(old: dict | None, prefix: str, members: List[Tuple[int, float]]) -> dict:
+        nonlocal written, reused
+        signature = _shard_signature(members, variant)
+        if old and old.get("signature") == signature and os.path.exists(os.path.join(out_dir, old["file"])):
+            reused += 1
+            return old
+        written += 1
+        return {"file": _write_shard(out_dir, prefix, [mid for mid, _ in members], thumbnail_base),
+                "count": len(members), "signature": signature}
+
+    old_pages = previous.get("pages", [])
+    pages = []
+    for n, start in enumerate(range(0, len(order), page_size)):
+        old = old_pages[n] if n < len(old_pages) else None
+        pages.append(shard(old, f"pages/{n + 1:04d}", order[start:start + page_size]))
+
+    tag_rows = Tag.query.filter(Tag.name != "replicate").order_by(Tag.name.asc()).all()
+    postings = get_tag_index().postings
+    old_tags = previous.get("tags", {})
+    tags = {}
+    for t in tag_rows:
+        ids = sorted(postings.get(t.name, ()), key=position.__getitem__)
+        slug = re.sub(r"[^a-z0-9]+", "-", t.name.lower()).strip("-") or "tag"
+        tags[t.name] = shard(old_tags.get(t.name), f"tags/{t.id}-{slug}", [(mid, stamps[mid]) for mid in ids])
+
+    manifest = {
+        "version": version,
+        "generated_at": time.time(),
+        "total": len(order),
+        "page_size": page_size,
+        "pages": pages,
+        "tags": tags,
+        "tag_list": [{"id": t.id, "name": t.name} for t in tag_rows],
     }
+    os.makedirs(out_dir, exist_ok=True)
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(manifest_path + ".tmp", manifest_path)
 
-    def keywords_to_tags(text: str) -> List[str]:
-        text = (text or "").lower()
-        found = set()
-        for k, tag in KEYWORDS.items():
-            if k in text:
-                found.add(tag)
-        return list(found)
+    # Drop shards no longer referenced (after the new manifest is in place)
+    live = {p["file"] for p in pages} | {t["file"] for t in tags.values()}
+    removed = 0
+    for sub in ("pages", "tags"):
+        folder = os.path.join(out_dir, sub)
+        for name in os.listdir(folder) if os.path.isdir(folder) else ():
+            if f"{sub}/{name}" not in live:
+                os.remove(os.path.join(folder, name))
+                removed += 1
+    return {"version": version, "total": len(order), "written": written, "reused": reused, "removed": removed}
 
-    updated = 0
-    for m in Model.query.all():
-        try:
-            r = requests.get(f"https://api.replicate.com/v1/models/{m.vendor}/{m.name}", headers=headers, timeout=15)
-            if r.status_code != 200:
-                continue
-            payload = r.json()
-            # Update description if payload has one and ours is generic/short
-            desc = (payload.get("description") or "").strip()
-            if desc and (m.description.lower().strip() == "model from replicate" or len(m.description) < 40):
-                # take first 220 chars
-                short = desc[:220].rstrip()
-                m.description = short
-            # Tags from payload + keywords
-            new_tags = set(derive_tags_from_model_payload(payload)) | set(keywords_to_tags(desc))
-            # Add visibility/official if present
-            vis = (payload.get("visibility") or "").lower()
-            if vis in ("public", "verified", "official"):
-                new_tags.add("official")
-            for t in new_tags:
-                tag = get_or_create_tag(t)
-                exists = ModelTag.query.filter_by(model_id=m.id, tag_id=tag.id).first()
-                if not exists:
-                    db.session.add(ModelTag(model_id=m.id, tag_id=tag.id))
-            updated += 1
-        except Exception:
-            continue
+
+@job_handler("export_static")
+def job_export_static(ctx: JobContext) -> dict:
+    return export_static_catalog(ctx.params.get("out_dir"))
+
+
+@app.route("/api/admin/export-static", methods=["POST"])
+def admin_export_static():
+    return start_job("export_static", {}, None)
+
+
+@app.cli.command("export-static")
+@click.option("--out", "out_dir", default=None, help=f"Output directory (default {EXPORT_DIR})")
+@click.option("--page-size", default=EXPORT_PAGE_SIZE, show_default=True)
+def export_static_command(out_dir: str | None, page_size: int):
+    """Write the sharded static catalog, rewriting only changed shards.
+
+    To publish a static deploy served from this repo, commit the output
+    directory (catalog/ by default) with its removed shards.
+    """
+    click.echo(json.dumps(export_static_catalog(out_dir, page_size)))
+
+
+@app.cli.command("init-db")
+def init_db_command():
+    """Apply pending schema migrations."""
+    applied = ensure_schema()
+    click.echo(f"Schema at version {SCHEMA_VERSION} ({applied} migrations applied) at {DB_PATH}")
+
+
+@app.cli.command("seed")
+def seed_command():
+    """Load the demo catalog and bundled JSON exports into an empty database."""
+    click.echo(f"{seed()} models added")
+
+
+@app.cli.command("import-models")
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+def import_models_command(paths: Tuple[str, ...]):
+    """Bulk import models from JSON or NDJSON (/api/models/export) files."""
+    ensure_schema()
+    records = [rec for path in paths for rec in load_model_records(path)]
+    added = import_models(records)
     db.session.commit()
-    return jsonify({"enriched": updated})
+    click.echo(f"{added} of {len(records)} models added")
+
 
 @app.route("/")
 def ok():
     return jsonify({"ok": True})
 
+
+_app_ready = False
+_app_ready_lock = threading.Lock()
+
+
+def create_app() -> Flask:
+    """Application factory for WSGI servers, e.g. `gunicorn -w 4 'server:create_app()'`.
+
+    Brings the schema up to date once per process, then drops the pooled
+    connections so forked workers (gunicorn --preload) open their own.
+    Seeding is a separate step: `flask --app server seed`.
+    """
+    global _app_ready
+    with _app_ready_lock:
+        if not _app_ready:
+            with app.app_context():
+                ensure_schema()
+                if app.config["CATALOG_SNAPSHOT"]:
+                    # Built before any fork, so preloaded workers start with it
+                    _refresh_snapshot()
+                db.engine.dispose()
+            _app_ready = True
+    return app
+
+
 if __name__ == "__main__":
-    with app.app_context():
-        seed()
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    create_app().run(host="0.0.0.0", port=5000, debug=True)
@@ -0,0 +1,179 @@
+"""Tag derivation from Replicate payloads and free text.
+
+All text rules are compiled into one regex alternation, longest phrase
+first, so a document is tagged in a single scan. Phrases match whole words
+only: "text" does not fire inside "context", and neither does "photo" inside
+"photograph". Hyphens separate words, so "image" fires in "image-editing"
+and "qwen-image"; listed hyphenated phrases such as "text-to-video" still win
+over their parts because the alternation is greedy. Spaces in a phrase match
+any run of spaces or hyphens, and a trailing "s" is accepted ("videos",
+"portraits").
+"""
+from __future__ import annotations
+
+import re
+from typing import Dict, Iterable, List, Mapping, Sequence, Set
+
+# Raw Replicate categories/modalities/tags -> our tag names; unknown values pass through
+CANONICAL_MAP = {
+    "image": "image-generation",
+    "images": "image-generation",
+    "text-to-image": "text-to-image",
+    "video": "video-generation",
+    "videos": "video-generation",
+    "text-to-video": "text-to-video",
+    "image-to-video": "image-to-video",
+    "music": "music-generation",
+    "audio": "audio",
+}
+
+# Coarse categories from descriptions, used everywhere tags are derived
+CATEGORY_RULES: Dict[str, Sequence[str]] = {
+    "video": ["video-generation"],
+    "text-to-video": ["text-to-video", "video-generation"],
+    "image-to-video": ["image-to-video", "video-generation"],
+    "image": ["image-generation"],
+    "imagen": ["image-generation"],
+    "text-to-image": ["text-to-image", "image-generation"],
+    "music": ["music-generation"],
+    "audio": ["music-generation"],
+}
+
+# Finer style and capability tags, added by enrich
+KEYWORD_RULES: Dict[str, Sequence[str]] = {
+    "photoreal": ["photoreal"],
+    "photorealistic": ["photoreal"],
+    "photo": ["photoreal"],
+    "realistic": ["photoreal"],
+    "anime": ["anime"],
+    "cartoon": ["cartoon"],
+    "3d": ["3d"],
+    "portrait": ["portrait"],
+    "face": ["portrait"],
+    "character": ["characters"],
+    "style": ["style"],
+    "upscale": ["upscaler"],
+    "upscaler": ["upscaler"],
+    "upscaling": ["upscaler"],
+    "nsfw": ["nsfw"],
+    "text": ["text-rendering"],
+    "text rendering": ["text-rendering"],
+    "audio": ["audio"],
+    "music": ["music-generation"],
+    "video": ["video-generation"],
+    "image": ["image-generation"],
+}
+
+PAYLOAD_TAG_FIELDS = ("categories", "modalities", "tags")
+# Joins documents for batch scans; it is a word boundary, so no phrase spans two documents
+_SEPARATOR = "\x00"
+
+
+_GAP = r"[\s-]+"
+
+
+def _phrase_key(text: str) -> str:
+    return re.sub(r"[\s-]+", " ", text.strip().lower())
+
+
+def _trie_regex(phrases: Iterable[str]) -> str:
+    """Alternation of `phrases` with shared prefixes factored out.
+
+    `re` tries alternatives one by one at every position; a trie-shaped
+    pattern rejects a position after one character test instead of dozens.
+    """
+    trie: dict = {}
+    for phrase in phrases:
+        node = trie
+        for atom in (_GAP if ch == " " else re.escape(ch) for ch in _phrase_key(phrase)):
+            node = node.setdefault(atom, {})
+        node[""] = {}
+
+    def render(node: dict) -> str:
+        optional = "" in node
+        branches = [atom + render(child) for atom, child in sorted(node.items()) if atom]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 and not optional else f"(?:{'|'.join(branches)})"
+        return body + "?" if optional else body
+
+    return render(trie)
+
+
+class Tagger:
+    """Compiled phrase -> tags rules plus raw tag aliases."""
+
+    def __init__(self, *rule_tables: Mapping[str, Iterable[str]], aliases: Mapping[str, str] = CANONICAL_MAP):
+        self.aliases = dict(aliases)
+        self.rules: Dict[str, frozenset] = {}
+        for table in rule_tables:
+            for phrase, tags in table.items():
+                self.rules[phrase.lower()] = self.rules.get(phrase.lower(), frozenset()) | frozenset(tags)
+        # Hyphenated phrases keep their hyphens; the lookup key collapses them with spaces
+        self._lookup: Dict[str, frozenset] = {}
+        for phrase, tags in self.rules.items():
+            key = _phrase_key(phrase)
+            self._lookup[key] = self._lookup.get(key, frozenset()) | tags
+        phrases = rf"(?<!\w)(?:{_trie_regex(self.rules)})s?(?!\w)"
+        # Text is lowercased before scanning; that beats re.IGNORECASE by a wide margin
+        self.pattern = re.compile(phrases)
+        # Batch scans also match the separator, to know where each document ends
+        self._batch_pattern = re.compile(rf"{_SEPARATOR}|{phrases}")
+        # Matched text as written ("videos", "text-to image") -> tags
+        self._matches: Dict[str, frozenset] = {}
+
+    def _tags_for_match(self, matched: str) -> frozenset:
+        tags = self._matches.get(matched)
+        if tags is None:
+            key = re.sub(_GAP, " ", matched)
+            tags = self._lookup.get(key)
+            if tags is None and key.endswith("s"):
+                tags = self._lookup.get(key[:-1])
+            tags = self._matches[matched] = tags or frozenset()
+        return tags
+
+    def scan(self, text: str | None) -> Set[str]:
+        """Tags for all phrases in `text`, in one pass."""
+        found: Set[str] = set()
+        if text:
+            for matched in set(self.pattern.findall(text.lower())):
+                found |= self._tags_for_match(matched)
+        return found
+
+    def scan_many(self, texts: Sequence[str | None]) -> List[Set[str]]:
+        """`scan` over many documents with a single regex pass."""
+        results: List[Set[str]] = [set()]
+        current = results[0]
+        for matched in self._batch_pattern.findall(_SEPARATOR.join(t or "" for t in texts).lower()):
+            if matched == _SEPARATOR:
+                current = set()
+                results.append(current)
+            else:
+                current |= self._tags_for_match(matched)
+        return results if texts else []
+
+    def raw_tags(self, payload: dict) -> Set[str]:
+        """Canonical tags from a payload's categories/modalities/tags lists."""
+        found: Set[str] = set()
+        for key in PAYLOAD_TAG_FIELDS:
+            values = payload.get(key)
+            if isinstance(values, list):
+                for raw in values:
+                    if isinstance(raw, str) and raw.strip():
+                        value = raw.strip().lower()
+                        found.add(self.aliases.get(value, value))
+        return found
+
+    def tags_for_payloads(self, payloads: Sequence[dict]) -> List[List[str]]:
+        """Raw tags plus description rules for each payload."""
+        scanned = self.scan_many([p.get("description") for p in payloads])
+        return [sorted(self.raw_tags(p) | found) for p, found in zip(payloads, scanned)]
+
+    def tags_for_payload(self, payload: dict) -> List[str]:
+        return sorted(self.raw_tags(payload) | self.scan(payload.get("description")))
+
+
+# Sync, retag and image updates
+payload_tagger = Tagger(CATEGORY_RULES)
+# Enrich: categories plus style keywords
+enrich_tagger = Tagger(CATEGORY_RULES, KEYWORD_RULES)
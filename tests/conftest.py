@@ -0,0 +1,43 @@
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# server binds its database at import; always point it at a throwaway file,
+# since fixtures empty the catalog (never a database from the developer's shell)
+os.environ["APP_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="tests-"), "app.db")
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """A running StubReplicate that new Replicate clients talk to, with a fresh token."""
+    import replicate_client
+    from bench.stub import StubReplicate
+
+    srv = StubReplicate(prediction_seconds=0.2).start()
+    monkeypatch.setattr(replicate_client, "REPLICATE_API_BASE", srv.base_url)
+    # get_client caches per token, so a new token means a client for this stub
+    monkeypatch.setenv("REPLICATE_API_TOKEN", f"test-{uuid.uuid4().hex}")
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture
+def app():
+    """The server app over an empty catalog and job table."""
+    import server
+
+    app = server.create_app()
+    with app.app_context():
+        server.ModelTag.query.delete()
+        server.Model.query.delete()
+        server.Job.query.delete()
+        server.bump_catalog_version()
+        server.db.session.commit()
+    return app
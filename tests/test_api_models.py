@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import event
+
+import server
+
+TAGS = ["image-generation", "video-generation", "upscale", "anime"]
+# Pages hold the whole catalog, so per-model queries would grow with it
+URLS = [
+    "/api/models?per_page=60",
+    "/api/models?per_page=60&q=vendor",
+    f"/api/models?per_page=60&tags={TAGS[0]},{TAGS[1]}&mode=any",
+    f"/api/models?per_page=60&tags={TAGS[0]},{TAGS[1]}&mode=all",
+]
+
+
+@pytest.fixture
+def client(app, monkeypatch):
+    monkeypatch.setattr(server, "_response_cache", server.ResponseCache(0))
+    return app.test_client()
+
+
+def add_models(start: int, count: int) -> None:
+    records = [
+        {
+            "vendor": f"vendor-{i % 7}",
+            "name": f"model-{i}",
+            "description": f"Model number {i}",
+            "image_url": f"https://example.com/{i}.png",
+            "tags": [TAGS[i % len(TAGS)], TAGS[(i + 1) % len(TAGS)]],
+        }
+        for i in range(start, start + count)
+    ]
+    with server.app.app_context():
+        server.import_models(records)
+        server.db.session.commit()
+
+
+def statement_counts(client) -> dict:
+    """Statements each URL runs, measured on a second call so index rebuilds do not count."""
+    counts = {}
+    with server.app.app_context():
+        engine = server.db.engine
+    for url in URLS:
+        assert client.get(url).status_code == 200
+        statements = [0]
+
+        def count(*args):
+            statements[0] += 1
+
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            resp = client.get(url)
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        assert resp.status_code == 200
+        assert resp.get_json()["items"]
+        counts[url] = statements[0]
+    return counts
+
+
+def test_statements_per_page_do_not_grow_with_catalog(client):
+    n = 20
+    add_models(0, n)
+    small = statement_counts(client)
+    add_models(n, 2 * n)
+    assert statement_counts(client) == small
@@ -0,0 +1,64 @@
+import pytest
+
+import server
+
+
+@pytest.fixture
+def client(app, monkeypatch):
+    monkeypatch.setattr(server, "_response_cache", server.ResponseCache(0))
+    with app.app_context():
+        server.import_models([
+            {"vendor": "acme", "name": f"model-{i}", "description": desc, "tags": ["anime"] if i % 3 == 0 else []}
+            for i, desc in enumerate([
+                "C++ inference helper", "Upscales photos 4x", "50% smaller weights", "Video model",
+                "video-to-video restyle", "Anime portraits", "Another c++ port", "Plain model",
+            ])
+        ])
+        server.db.session.commit()
+    return app.test_client()
+
+
+def fetch(client, monkeypatch, url: str, snapshot: bool) -> dict:
+    monkeypatch.setitem(server.app.config, "CATALOG_SNAPSHOT", snapshot)
+    if snapshot:
+        server._refresh_snapshot()
+    resp = client.get(url)
+    return {"status": resp.status_code, **(resp.get_json() if resp.is_json else {})}
+
+
+@pytest.mark.parametrize("url", [
+    "/api/models?q=%2B%2B",  # "++": no word characters, substring scan
+    "/api/models?q=%25",  # "%" matches everything, as in LIKE
+    "/api/models?q=-",
+    "/api/models?q=%2B%2B&tags=anime",
+    "/api/models?q=video",
+    "/api/models?q=mod&tags=anime",
+    "/api/models?tags=anime&mode=all",
+])
+def test_snapshot_and_sql_match_the_same_models(client, monkeypatch, url):
+    sql = fetch(client, monkeypatch, url + "&per_page=60", snapshot=False)
+    snap = fetch(client, monkeypatch, url + "&per_page=60", snapshot=True)
+    assert sql["total"] == snap["total"] > 0
+    assert {m["id"] for m in sql["items"]} == {m["id"] for m in snap["items"]}
+
+
+def test_substring_pages_follow_catalog_order_in_both_modes(client, monkeypatch):
+    for snapshot in (False, True):
+        first = fetch(client, monkeypatch, "/api/models?q=%25&per_page=3", snapshot)
+        second = fetch(client, monkeypatch, f"/api/models?q=%25&per_page=3&after={first['next_cursor']}", snapshot)
+        everything = fetch(client, monkeypatch, "/api/models?per_page=6", snapshot)
+        assert [m["id"] for m in first["items"] + second["items"]] == [m["id"] for m in everything["items"]]
+
+
+def test_ranked_cursors_only_page_the_mode_that_issued_them(client, monkeypatch):
+    url = "/api/models?q=model&per_page=1"
+    for issued_by, other in ((False, True), (True, False)):
+        cursor = fetch(client, monkeypatch, url, issued_by)["next_cursor"]
+        assert fetch(client, monkeypatch, f"{url}&after={cursor}", issued_by)["status"] == 200
+        assert fetch(client, monkeypatch, f"{url}&after={cursor}", other)["status"] == 400
+
+
+def test_catalog_order_cursors_work_in_either_mode(client, monkeypatch):
+    cursor = fetch(client, monkeypatch, "/api/models?per_page=2", snapshot=False)["next_cursor"]
+    pages = [fetch(client, monkeypatch, f"/api/models?per_page=2&after={cursor}", s)["items"] for s in (False, True)]
+    assert pages[0] == pages[1]
@@ -0,0 +1,64 @@
+import glob
+import json
+import os
+
+import pytest
+
+import server
+
+
+def read_shards(out_dir: str, sub: str = "pages") -> list:
+    items = []
+    for path in sorted(glob.glob(os.path.join(out_dir, sub, "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            items += json.load(f)
+    return items
+
+
+@pytest.fixture
+def catalog(app):
+    with app.app_context():
+        server.import_models([
+            {"vendor": "v", "name": f"m{i}", "image_url": f"https://img.example/{i}.png", "tags": ["anime"]}
+            for i in range(5)
+        ])
+        server.db.session.commit()
+    return app
+
+
+@pytest.mark.skipif(server.thumbnail_cache is None, reason="needs Pillow")
+def test_shards_carry_absolute_thumbnails_when_a_base_url_is_set(catalog, tmp_path, monkeypatch):
+    out = str(tmp_path)
+    with catalog.app_context():
+        monkeypatch.setitem(catalog.config, "THUMBNAIL_BASE_URL", "")
+        server.export_static_catalog(out)
+        assert all("thumbnail" not in m for m in read_shards(out))
+
+        monkeypatch.setitem(catalog.config, "THUMBNAIL_BASE_URL", "https://api.example.com")
+        summary = server.export_static_catalog(out)
+        assert summary["reused"] == 0  # same (id, updated_at), new URLs
+        for m in read_shards(out) + read_shards(out, "tags"):
+            assert m["thumbnail"]["src"].startswith(f"https://api.example.com/api/thumbs/{m['id']}/")
+
+        assert server.export_static_catalog(out)["written"] == 0
+
+
+@pytest.mark.parametrize("accept, gzipped", [
+    ("gzip", True),
+    ("deflate, gzip;q=0.5", True),
+    ("*", True),
+    ("gzip;q=0", False),
+    ("identity", False),
+    ("", False),
+])
+def test_ndjson_export_honours_accept_encoding(catalog, accept, gzipped):
+    resp = catalog.test_client().get("/api/models/export", headers={"Accept-Encoding": accept})
+    assert (resp.headers.get("Content-Encoding") == "gzip") is gzipped
+    assert resp.headers["Vary"] == "Accept-Encoding"
+
+
+def test_ndjson_export_leaves_out_thumbnails(catalog):
+    lines = catalog.test_client().get("/api/models/export").get_data(as_text=True).splitlines()
+    models = [json.loads(line) for line in lines]
+    assert len(models) == 5
+    assert all("thumbnail" not in m for m in models)
@@ -0,0 +1,125 @@
+import json
+import socket
+import subprocess
+import sys
+import time
+import uuid
+
+import pytest
+
+import server
+from bench.catalog import generate_payloads
+
+
+@pytest.fixture
+def catalog(stub):
+    stub.page_size = 100
+    stub.load(generate_payloads(250))
+    return stub
+
+
+def add_job(kind: str, params: dict, **fields) -> str:
+    now = time.time()
+    fields = {"status": "running", "created_at": now, "updated_at": now, **fields}
+    job = server.Job(id=uuid.uuid4().hex, kind=kind, params=json.dumps(params), **fields)
+    server.db.session.add(job)
+    server.db.session.commit()
+    return job.id
+
+
+def wait_for(job_id: str, timeout: float = 10.0) -> server.Job:
+    deadline = time.monotonic() + timeout
+    while True:
+        server.db.session.expire_all()
+        job = server.db.session.get(server.Job, job_id)
+        if job.status in ("succeeded", "failed", "cancelled"):
+            return job
+        assert time.monotonic() < deadline, f"job still {job.status}"
+        time.sleep(0.05)
+
+
+def dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def test_restart_resumes_jobs_of_a_gone_process_from_their_checkpoint(app, catalog, monkeypatch):
+    checkpoint = {"next": f"{catalog.base_url}/models?cursor=100", "walk_started_at": time.time(),
+                  "imported": 100, "created": 100}
+    with app.app_context():
+        # Cut off by a restart seconds ago: the heartbeat is recent, the process is gone
+        job_id = add_job("sync_replicate", {"mode": "limit", "limit": None},
+                         owner=f"{socket.gethostname()}:{dead_pid()}:0badb00t",
+                         updated_at=time.time() - 10, checkpoint=json.dumps(checkpoint), processed=100)
+    # A fresh process resumes on its first request
+    monkeypatch.setattr(server, "_jobs_pid", None)
+    assert app.test_client().get("/api/tags").status_code == 200
+    with app.app_context():
+        job = wait_for(job_id)
+        assert job.status == "succeeded"
+        assert job.processed == 250
+        assert json.loads(job.result)["imported"] == 250
+        assert job.owner == server.job_owner()
+        # Only the pages after the checkpoint were fetched
+        assert catalog.hits["list"] == 2
+        assert server.Model.query.count() == 150
+
+
+def test_restart_with_the_same_pid_is_told_apart_by_boot_id(app, catalog):
+    with app.app_context():
+        job_id = add_job("sync_replicate", {"mode": "limit", "limit": 10},
+                         owner=f"{socket.gethostname()}:{server.os.getpid()}:0badb00t")
+        server.resume_jobs()
+        assert wait_for(job_id).status == "succeeded"
+
+
+def test_jobs_of_live_processes_are_left_alone(app):
+    with app.app_context():
+        # The test runner's parent is alive; its job's heartbeat is recent
+        job_id = add_job("sync_replicate", {}, owner=f"{socket.gethostname()}:{server.os.getppid()}:12345678")
+        server.resume_jobs()
+        server.db.session.expire_all()
+        assert server.db.session.get(server.Job, job_id).status == "running"
+
+
+def test_stale_heartbeat_resumes_jobs_from_other_hosts(app, catalog):
+    with app.app_context():
+        job_id = add_job("sync_replicate", {"mode": "limit", "limit": 10}, owner="elsewhere:1:12345678",
+                         updated_at=time.time() - server.JOB_STALE_SECONDS - 1)
+        server.resume_jobs()
+        assert wait_for(job_id).status == "succeeded"
+
+
+def test_cancel_running_job(app, catalog):
+    catalog.page_size = 10
+    catalog.latency = 0.05
+    client = app.test_client()
+    job_id = client.post("/api/sync/replicate?limit=250").get_json()["id"]
+    with app.app_context():
+        deadline = time.monotonic() + 10
+        while server.db.session.get(server.Job, job_id).processed == 0:
+            assert time.monotonic() < deadline
+            time.sleep(0.02)
+            server.db.session.expire_all()
+    assert client.post(f"/api/jobs/{job_id}/cancel").get_json()["cancel_requested"] is True
+    with app.app_context():
+        job = wait_for(job_id)
+        assert job.status == "cancelled"
+        assert 0 < job.processed < 250
+
+
+def test_cancel_requested_before_a_restart_is_honoured(app, catalog):
+    with app.app_context():
+        job_id = add_job("sync_replicate", {"mode": "limit", "limit": 10}, cancel_requested=True,
+                         owner=f"{socket.gethostname()}:{dead_pid()}:0badb00t")
+        server.resume_jobs()
+        assert wait_for(job_id).status == "cancelled"
+    assert catalog.hits["list"] == 0
+
+
+def test_cancel_queued_job(app):
+    with app.app_context():
+        job_id = add_job("sync_replicate", {}, status="queued")
+    job = app.test_client().post(f"/api/jobs/{job_id}/cancel").get_json()
+    assert job["status"] == "cancelled"
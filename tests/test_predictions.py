@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+import predictions
+from predictions import PredictionGateway, TERMINAL_STATUSES
+from replicate_client import ReplicateClient
+
+
+@pytest.fixture
+def gateway(stub):
+    client = ReplicateClient("test", base_url=stub.base_url, rate=0)
+    yield PredictionGateway(lambda: client, poll_interval=0.02, max_per_model=1)
+    client.close()
+
+
+def wait_done(gateway: PredictionGateway, pred, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    with gateway._lock:
+        while pred.status not in TERMINAL_STATUSES:
+            assert time.monotonic() < deadline, f"prediction still {pred.status}"
+            pred.changed.wait(0.05)
+    return pred
+
+
+def test_identical_requests_in_flight_share_one_upstream_prediction(gateway, stub):
+    first, source = gateway.submit("test/echo", None, {"prompt": "hi", "n": 1})
+    assert source == "created"
+    for _ in range(3):
+        # Key order inside the input does not matter
+        pred, source = gateway.submit("test/echo", None, {"n": 1, "prompt": "hi"})
+        assert (pred, source) == (first, "deduplicated")
+    assert wait_done(gateway, first).status == "succeeded"
+    assert first.output == {"prompt": "hi", "n": 1}
+    assert stub.hits["create"] == 1
+
+
+def test_model_slots_pass_to_queued_predictions(gateway, stub):
+    preds = [gateway.submit("test/echo", None, {"i": i}) for i in range(3)]
+    assert [source for _, source in preds] == ["created", "queued", "queued"]
+    assert gateway.snapshot_stats()["running"] == 1
+    assert gateway.snapshot_stats()["queued"] == 2
+    # Another model is not held up by the queue
+    other, source = gateway.submit("test/other", None, {})
+    assert source == "created"
+
+    for pred, _ in preds:
+        assert wait_done(gateway, pred).status == "succeeded"
+    wait_done(gateway, other)
+    # Started one after another, each when the previous one finished
+    completed = [pred.completed_at for pred, _ in preds]
+    assert completed == sorted(completed)
+    assert stub.hits["create"] == 4
+    stats = gateway.snapshot_stats()
+    assert (stats["running"], stats["queued"]) == (0, 0)
+
+
+def test_succeeded_outputs_are_cached_without_their_input(gateway, stub):
+    pred = wait_done(gateway, gateway.submit("test/echo", None, {"image": "data:..."})[0])
+    assert pred.input is None
+    assert gateway._cache[pred.key][1:] == (pred.output, pred.metrics)
+
+    cached, source = gateway.submit("test/echo", None, {"image": "data:..."})
+    assert source == "cached"
+    assert (cached.status, cached.output, cached.cached) == ("succeeded", pred.output, True)
+    assert stub.hits["create"] == 1
+
+    gateway.cache_ttl = 0
+    fresh, source = gateway.submit("test/echo", None, {"image": "data:..."})
+    assert source == "created"
+    assert stub.hits["create"] == 2
+    wait_done(gateway, fresh)
+
+
+def test_failed_create_frees_the_slot(stub):
+    client = ReplicateClient("test", base_url=f"{stub.base_url}/missing", rate=0, max_retries=0)
+    gateway = PredictionGateway(lambda: client, poll_interval=0.02, max_per_model=1)
+    first, _ = gateway.submit("test/echo", None, {"i": 1})
+    second, source = gateway.submit("test/echo", None, {"i": 2})
+    assert (first.status, second.status, source) == ("failed", "failed", "created")
+    assert "404" in first.error
+    assert gateway.snapshot_stats()["running"] == 0
+
+
+@pytest.fixture
+def app(stub):
+    app = Flask(__name__)
+    app.config.update(PREDICTION_MODELS="test/echo:v1, test/latest", PREDICTION_POLL_INTERVAL=0.02)
+    token = {"value": os.environ["REPLICATE_API_TOKEN"]}
+    app.gateway = predictions.init_app(app, lambda: token["value"])
+    app.token = token
+    return app
+
+
+def test_routes_only_run_allowed_models_and_versions(app, stub):
+    client = app.test_client()
+    assert client.post("/api/predictions", json={"model": "evil/model", "input": {}}).status_code == 403
+    assert client.post("/api/predictions", json={"model": "test/echo", "version": "v2", "input": {}}).status_code == 403
+    assert client.post("/api/predictions", json={"model": "test/latest", "version": "v1", "input": {}}).status_code == 403
+    assert client.post("/api/predictions", json={"model": "nope", "input": {}}).status_code == 400
+    assert client.post("/api/predictions", json={"model": "test/echo", "input": []}).status_code == 400
+    assert stub.hits["create"] == 0
+
+    # The pinned version runs whether or not the request names it
+    resp = client.post("/api/predictions", json={"model": "test/echo", "input": {"a": 1}})
+    assert resp.status_code == 201
+    assert resp.get_json()["version"] == "v1"
+    resp = client.post("/api/predictions", json={"model": "test/echo", "version": "v1", "input": {"a": 1}})
+    assert resp.get_json()["source"] == "deduplicated"
+    resp = client.post("/api/predictions", json={"model": "test/latest", "input": {}})
+    assert (resp.status_code, resp.get_json()["version"]) == (201, None)
+    # Let them finish before the stub goes away
+    for pred in list(app.gateway._predictions.values()):
+        wait_done(app.gateway, pred)
+
+
+def test_routes_without_a_token(app):
+    app.token["value"] = None
+    resp = app.test_client().post("/api/predictions", json={"model": "test/echo", "input": {}})
+    assert resp.status_code == 503
+
+
+def test_event_stream_ends_when_the_prediction_finishes(app):
+    client = app.test_client()
+    created = client.post("/api/predictions", json={"model": "test/echo", "input": {"a": 1}}).get_json()
+    result = {}
+
+    def read():
+        resp = client.get(f"/api/predictions/{created['id']}/events")
+        result["mimetype"], result["body"] = resp.mimetype, resp.get_data(as_text=True)
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    reader.join(5)
+    assert not reader.is_alive(), "event stream did not end"
+    assert result["mimetype"] == "text/event-stream"
+    events = [json.loads(line[6:]) for line in result["body"].splitlines() if line.startswith("data: ")]
+    assert events[-1]["status"] == "succeeded"
+    assert events[-1]["output"] == {"a": 1}
+    assert all(e["status"] not in TERMINAL_STATUSES for e in events[:-1])
+
+    assert client.get(f"/api/predictions/{created['id']}").get_json()["status"] == "succeeded"
+    assert client.get("/api/predictions/unknown").status_code == 404
+    assert client.get("/api/predictions/unknown/events").status_code == 404
+    assert client.get("/api/admin/predictions").get_json()["created"] == 1
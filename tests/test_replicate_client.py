@@ -0,0 +1,111 @@
+import time
+
+import pytest
+import requests
+
+import replicate_client
+from replicate_client import MAX_CLIENTS, ReplicateClient, ReplicateError, TokenBucket, get_client
+
+
+def client_for(stub, **kwargs) -> ReplicateClient:
+    """A client for `stub` that records the delays it picks between attempts
+    in `client.sleeps` instead of sleeping."""
+    client = ReplicateClient("test", base_url=stub.base_url, rate=0, **kwargs)
+    client.sleeps = []
+    delay = client._delay
+
+    def record(attempt, retry_after):
+        client.sleeps.append(delay(attempt, retry_after))
+        return 0
+
+    client._delay = record
+    return client
+
+
+def test_429_is_retried_after_retry_after(stub):
+    # The stub answers every third request it counts (429s included) with a 429
+    stub.throttle_every = 3
+    stub.retry_after = "1.5"
+    client = client_for(stub, backoff=10)
+    for _ in range(3):
+        client.get_json("models")
+    assert stub.hits["throttled"] == 1
+    assert stub.hits["list"] == 4
+    assert client.sleeps == [1.5]
+
+
+def test_retry_after_is_capped_by_max_backoff(stub):
+    stub.throttle_every = 1
+    stub.retry_after = "120"
+    client = client_for(stub, max_retries=2, max_backoff=5)
+    resp = client.request("GET", "models")
+    assert resp.status_code == 429
+    assert stub.hits["throttled"] == 3
+    assert client.sleeps == [5, 5]
+
+
+def test_exponential_backoff_without_retry_after(stub):
+    stub.throttle_every = 1
+    stub.retry_after = None
+    client = client_for(stub, max_retries=3, backoff=0.5)
+    with pytest.raises(ReplicateError) as exc:
+        client.get_json("models")
+    assert exc.value.status == 429
+    assert stub.hits["throttled"] == 4
+    assert len(client.sleeps) == 3
+    for attempt, delay in enumerate(client.sleeps):
+        assert 0.5 * 2 ** attempt * 0.5 <= delay <= 0.5 * 2 ** attempt
+
+
+def test_post_is_retried_on_429(stub):
+    stub.throttle_every = 3
+    client = client_for(stub)
+    client.get_json("models")
+    client.get_json("models")
+    assert client.create_prediction("test/echo", {"a": 1})["status"] == "processing"
+    assert stub.hits["throttled"] == 1
+    assert len(client.sleeps) == 1
+
+
+def test_read_timeout_retries_get_but_not_post(stub):
+    stub.latency = 0.3
+    client = client_for(stub, max_retries=2, timeout=0.1)
+    with pytest.raises(requests.ReadTimeout):
+        client.create_prediction("test/echo", {"a": 1})
+    assert client.sleeps == []
+    with pytest.raises(requests.ReadTimeout):
+        client.get_json("models")
+    assert len(client.sleeps) == 2
+    time.sleep(0.5)  # the stub counts a request after its latency
+    assert (stub.hits["create"], stub.hits["list"]) == (1, 3)
+
+
+def test_token_bucket_spaces_requests_after_a_burst():
+    bucket = TokenBucket(rate=50, capacity=5)
+    started = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - started < 0.05  # the burst
+    for _ in range(10):
+        bucket.acquire()
+    assert time.monotonic() - started >= 10 / 50 * 0.9
+
+
+def test_token_bucket_rate_zero_is_unlimited():
+    bucket = TokenBucket(rate=0)
+    started = time.monotonic()
+    for _ in range(1000):
+        bucket.acquire()
+    assert time.monotonic() - started < 0.5
+
+
+def test_get_client_keeps_only_recent_tokens():
+    first = get_client("lru-0")
+    for i in range(1, MAX_CLIENTS):
+        get_client(f"lru-{i}")
+    assert get_client("lru-0") is first  # now the most recent
+    for i in range(MAX_CLIENTS, 2 * MAX_CLIENTS - 1):
+        get_client(f"lru-{i}")
+    assert get_client("lru-0") is first
+    assert "lru-1" not in replicate_client._clients
+    assert len(replicate_client._clients) == MAX_CLIENTS
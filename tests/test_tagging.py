@@ -0,0 +1,34 @@
+import pytest
+
+from tagging import enrich_tagger, payload_tagger
+
+
+@pytest.mark.parametrize("text, tag", [
+    ("an image-to-image model", "image-generation"),
+    ("video-to-video restyle", "video-generation"),
+    ("text-to-audio generator", "music-generation"),
+    ("image-editing", "image-generation"),
+    ("Qwen-image fine-tuned for portraits", "image-generation"),
+    ("audio-driven talking avatar", "music-generation"),
+    ("minimax-video", "video-generation"),
+])
+def test_hyphenated_compounds_keep_category_tags(text, tag):
+    assert tag in payload_tagger.scan(text)
+
+
+def test_listed_hyphenated_phrases_win_over_their_parts():
+    assert payload_tagger.scan("text-to-video model") == {"text-to-video", "video-generation"}
+    assert payload_tagger.scan("image-to-video") == {"image-to-video", "video-generation"}
+
+
+def test_whole_words_only():
+    assert enrich_tagger.scan("a context photograph") == set()
+
+
+def test_plurals():
+    assert enrich_tagger.scan("Videos of portraits") == {"video-generation", "portrait"}
+
+
+def test_scan_many_matches_scan():
+    texts = ["text-to-video", "image-editing", "", None, "audio-driven"]
+    assert payload_tagger.scan_many(texts) == [payload_tagger.scan(t) for t in texts]
@@ -0,0 +1,247 @@
+"""Cover image thumbnails: fetch once, resize in a process pool, cache on disk.
+
+Each source image is fetched through a pluggable fetcher (HTTP by default,
+`file_fetcher` for local files) and rendered in every configured width and
+format in one pool task. Results live in a content-addressed disk cache:
+
+    <root>/urls/<sha256(url)>             -> content hash of the fetched source
+    <root>/thumbs/<hash[:2]>/<hash>-<width>.<format>
+
+File mtimes double as LRU timestamps; once the cache grows past its byte
+budget the least recently served files are deleted.
+
+Pillow is optional. Without it `available()` is false and callers keep
+serving the original image URLs.
+"""
+from __future__ import annotations
+
+import functools
+import hashlib
+import importlib.util
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Tuple
+from urllib.parse import urlsplit
+
+# requests and Pillow are imported on first use, keeping them off the startup path
+
+WIDTHS = (320, 640, 960)
+MIME_TYPES = {"avif": "image/avif", "webp": "image/webp"}
+QUALITY = {"avif": 50, "webp": 78}
+MAX_SOURCE_BYTES = 20 * 1024 * 1024
+# Render workers are not forked: the server has threads (pollers, connection
+# pool) whose locks a forked child could inherit held
+_MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+Fetcher = Callable[[str], bytes]
+
+
+class ThumbnailError(Exception):
+    """The source could not be fetched or decoded."""
+
+
+def http_fetcher(url: str, timeout: float = 15.0) -> bytes:
+    import requests
+
+    try:
+        with requests.get(url, timeout=timeout, stream=True) as resp:
+            if resp.status_code != 200:
+                raise ThumbnailError(f"{url}: HTTP {resp.status_code}")
+            body = bytearray()
+            for chunk in resp.iter_content(64 * 1024):
+                body += chunk
+                if len(body) > MAX_SOURCE_BYTES:
+                    raise ThumbnailError(f"{url}: larger than {MAX_SOURCE_BYTES} bytes")
+            return bytes(body)
+    except requests.RequestException as exc:
+        raise ThumbnailError(f"{url}: {exc}") from exc
+
+
+def file_fetcher(root: str) -> Fetcher:
+    """Fetcher serving each URL's path from files under `root` (for tests and fixtures)."""
+    def fetch(url: str) -> bytes:
+        path = os.path.join(root, urlsplit(url).path.lstrip("/"))
+        try:
+            with open(path, "rb") as fh:
+                return fh.read()
+        except OSError as exc:
+            raise ThumbnailError(str(exc)) from exc
+    return fetch
+
+
+@functools.lru_cache(maxsize=None)
+def available() -> bool:
+    return importlib.util.find_spec("PIL") is not None
+
+
+def supported_formats() -> Tuple[str, ...]:
+    if not available():
+        return ()
+    from PIL import features
+
+    return tuple(fmt for fmt in ("avif", "webp") if features.check(fmt))
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def render(source: bytes, widths: Iterable[int], formats: Iterable[str]) -> Dict[Tuple[int, str], bytes]:
+    """Encode `source` at each width (never upscaled) and format. Runs in pool workers."""
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(source)) as im:
+        im = ImageOps.exif_transpose(im)
+        im = im.convert("RGBA" if im.mode in ("RGBA", "LA", "P") else "RGB")
+        out = {}
+        for width in widths:
+            height = max(round(im.height * min(width, im.width) / im.width), 1)
+            resized = im.resize((min(width, im.width), height), Image.LANCZOS) if width < im.width else im
+            for fmt in formats:
+                buf = io.BytesIO()
+                resized.save(buf, fmt.upper(), quality=QUALITY[fmt])
+                out[(width, fmt)] = buf.getvalue()
+        return out
+
+
+class ThumbnailCache:
+    """Content-addressed thumbnail store with an LRU byte budget."""
+
+    def __init__(
+        self,
+        root: str,
+        max_bytes: int = 512 * 1024 * 1024,
+        workers: int = 2,
+        fetcher: Fetcher = http_fetcher,
+        widths: Tuple[int, ...] = WIDTHS,
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.workers = max(1, workers)
+        self.fetcher = fetcher
+        self.widths = widths
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._size: int | None = None
+
+    @functools.cached_property
+    def formats(self) -> Tuple[str, ...]:
+        return supported_formats()
+
+    def _path(self, content_hash: str, width: int, fmt: str) -> str:
+        return os.path.join(self.root, "thumbs", content_hash[:2], f"{content_hash}-{width}.{fmt}")
+
+    def _url_path(self, url: str) -> str:
+        return os.path.join(self.root, "urls", url_key(url))
+
+    def _content_hash(self, url: str) -> str | None:
+        try:
+            with open(self._url_path(url), encoding="ascii") as fh:
+                return fh.read().strip() or None
+        except OSError:
+            return None
+
+    def get(self, url: str, width: int, fmt: str) -> str:
+        """Path of the cached thumbnail, fetching and rendering on a miss."""
+        if width not in self.widths or fmt not in self.formats:
+            raise ValueError(f"unsupported thumbnail {width}.{fmt}")
+        content_hash = self._content_hash(url)
+        if content_hash:
+            path = self._path(content_hash, width, fmt)
+            if os.path.exists(path):
+                os.utime(path)  # LRU touch
+                return path
+        return self._path(self._produce(url), width, fmt)
+
+    def _produce(self, url: str) -> str:
+        # One fetch and render per URL at a time; concurrent requests wait on it
+        with self._lock:
+            future = self._inflight.get(url)
+            owner = future is None
+            if owner:
+                future = self._inflight[url] = Future()
+        if not owner:
+            return future.result()
+        try:
+            content_hash = self._fetch_and_render(url)
+            future.set_result(content_hash)
+            return content_hash
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(url, None)
+
+    def _fetch_and_render(self, url: str) -> str:
+        source = self.fetcher(url)
+        content_hash = hashlib.sha256(source).hexdigest()
+        missing = [
+            (w, f) for w in self.widths for f in self.formats
+            if not os.path.exists(self._path(content_hash, w, f))
+        ]
+        if missing:
+            try:
+                variants = self._executor().submit(
+                    render, source, sorted({w for w, _ in missing}), sorted({f for _, f in missing})
+                ).result()
+            except Exception as exc:
+                raise ThumbnailError(f"{url}: {exc}") from exc
+            written = 0
+            for (width, fmt), data in variants.items():
+                written += self._write(self._path(content_hash, width, fmt), data)
+            self._grow(written)
+        self._write(self._url_path(url), content_hash.encode())
+        return content_hash
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=_MP_CONTEXT)
+            return self._pool
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> int:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+        return len(data)
+
+    def _grow(self, added: int) -> None:
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += added
+            if self._size <= self.max_bytes:
+                return
+            # Evict least recently used down to 90% of the budget
+            target = self.max_bytes * 0.9
+            for path, size, _ in sorted(self._entries(), key=lambda e: e[2]):
+                if self._size <= target:
+                    break
+                try:
+                    os.remove(path)
+                    self._size -= size
+                except OSError:
+                    pass
+
+    def _entries(self) -> List[Tuple[str, int, float]]:
+        entries = []
+        for dirpath, _, files in os.walk(os.path.join(self.root, "thumbs")):
+            for name in files:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, st.st_size, st.st_mtime))
+        return entries